@@ -0,0 +1,106 @@
+# --------------------------
+# 📁 agent/answer_cache.py
+# --------------------------
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+# all-MiniLM-L6-v2 puts paraphrases ("what dataset do they use?" / "which
+# dataset is used?") above ~0.9, while questions about different sections of
+# the same paper usually stay below it
+ANSWER_CACHE_THRESHOLD = 0.92
+ANSWER_CACHE_TTL = 24 * 60 * 60
+ANSWER_CACHE_MAX_ENTRIES = 2000
+
+
+class SemanticAnswerCache:
+    """
+    Answers to earlier questions, keyed by (document identity, model) and
+    matched on the cosine similarity of question embeddings. A lookup only
+    returns an answer whose question reaches `threshold` against the new one.
+
+    Entries expire `ttl` seconds after they were stored. Once there are more
+    than `max_entries`, the least recently used entries are dropped.
+    """
+
+    def __init__(self, embedder=None, threshold=ANSWER_CACHE_THRESHOLD, ttl=ANSWER_CACHE_TTL,
+                 max_entries=ANSWER_CACHE_MAX_ENTRIES):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._embedder = embedder
+        self._entries = OrderedDict()  # entry id -> (scope, vector, question, answer, stored at), LRU first
+        self._scopes = {}  # (document, model) -> set of entry ids
+        self._ids = 0
+        self._lock = threading.Lock()
+
+    @property
+    def embedder(self):
+        if self._embedder is None:
+            from agent.embedder import SharedModelEmbeddings
+            self._embedder = SharedModelEmbeddings()
+        return self._embedder
+
+    def _embed(self, question):
+        vector = np.asarray(self.embedder.embed_query(question), dtype=np.float32)
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+    def _drop(self, entry_id):
+        scope = self._entries.pop(entry_id)[0]
+        ids = self._scopes[scope]
+        ids.discard(entry_id)
+        if not ids:
+            del self._scopes[scope]
+
+    def lookup(self, document_id, model_id, question):
+        """
+        Returns:
+            (answer, similarity) of the closest cached question, or None
+        """
+        scope = (document_id, model_id)
+        if scope not in self._scopes:
+            with self._lock:
+                self.misses += 1
+            return None
+        vector = self._embed(question)
+        with self._lock:
+            now = time.time()
+            best, best_score = None, self.threshold
+            for entry_id in list(self._scopes.get(scope, ())):
+                _, cached, _, _, stored_at = self._entries[entry_id]
+                if now - stored_at > self.ttl:
+                    self._drop(entry_id)
+                    continue
+                score = float(cached @ vector)
+                if score >= best_score:
+                    best, best_score = entry_id, score
+            if best is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(best)
+            return self._entries[best][3], best_score
+
+    def store(self, document_id, model_id, question, answer):
+        scope = (document_id, model_id)
+        vector = self._embed(question)
+        with self._lock:
+            self._ids += 1
+            self._entries[self._ids] = (scope, vector, question, answer, time.time())
+            self._scopes.setdefault(scope, set()).add(self._ids)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self._entries),
+            }
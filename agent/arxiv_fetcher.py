@@ -1,9 +1,9 @@
 # -------------------------
 # 📁 agent/arxiv_fetcher.py
 # -------------------------
-import arxiv
-
 def fetch_arxiv_papers(query, max_results=3):
+    import arxiv
+
     client = arxiv.Client()
     search = arxiv.Search(query=query, max_results=max_results, sort_by=arxiv.SortCriterion.Relevance)
     results = []
@@ -0,0 +1,110 @@
+# -------------------------
+# 📁 agent/chunker.py
+# -------------------------
+import re
+from functools import lru_cache
+
+import tiktoken
+
+# all-MiniLM-L6-v2 truncates at 256 word pieces, so chunks stay comfortably below it
+CHUNK_TOKENS = 200
+CHUNK_OVERLAP = 40
+ENCODING_NAME = "cl100k_base"
+
+_PARAGRAPH_RE = re.compile(r"\n\s*\n")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9(\[\"'])")
+
+
+@lru_cache(maxsize=None)
+def _encoding(encoding_name):
+    return tiktoken.get_encoding(encoding_name)
+
+
+def count_tokens(text, encoding_name=ENCODING_NAME):
+    return len(_encoding(encoding_name).encode_ordinary(text))
+
+
+def _sentences(paragraph, max_tokens, enc):
+    for sentence in _SENTENCE_RE.split(paragraph):
+        ids = enc.encode_ordinary(sentence)
+        if len(ids) <= max_tokens:
+            yield sentence, len(ids)
+            continue
+        # A single run-on "sentence" (tables, equations) is cut into token windows
+        for start in range(0, len(ids), max_tokens):
+            window = ids[start:start + max_tokens]
+            yield enc.decode(window), len(window)
+
+
+def _join(pieces):
+    parts = []
+    last_paragraph = None
+    for text, _, paragraph in pieces:
+        if parts:
+            parts.append("\n\n" if paragraph != last_paragraph else " ")
+        parts.append(text)
+        last_paragraph = paragraph
+    return "".join(parts)
+
+
+def chunk_text(text, max_tokens=CHUNK_TOKENS, overlap=CHUNK_OVERLAP, encoding_name=ENCODING_NAME):
+    """
+    Packs text into chunks of at most `max_tokens` tiktoken tokens.
+
+    Paragraphs (blank-line separated) are kept whole whenever they fit in a
+    chunk and are otherwise split at sentence boundaries. Each chunk repeats
+    the trailing sentences of the previous one, up to `overlap` tokens.
+
+    Returns:
+        List of chunk strings
+    """
+    enc = _encoding(encoding_name)
+    chunks = []
+    current = []  # (sentence, n_tokens, paragraph_index)
+    size = 0
+    fresh = False  # whether `current` holds anything beyond the carried overlap
+
+    def flush():
+        nonlocal current, size, fresh
+        chunks.append(_join(current))
+        carried = []
+        for piece in reversed(current):
+            if sum(n for _, n, _ in carried) + piece[1] > overlap:
+                break
+            carried.insert(0, piece)
+        current, size, fresh = carried, sum(n for _, n, _ in carried), False
+
+    for index, paragraph in enumerate(_PARAGRAPH_RE.split(text)):
+        # Single line breaks inside a paragraph are layout, not structure
+        paragraph = " ".join(paragraph.split())
+        if not paragraph:
+            continue
+        pieces = list(_sentences(paragraph, max_tokens, enc))
+        paragraph_size = sum(n for _, n in pieces)
+        # Start a fresh chunk rather than splitting a paragraph that would fit in one
+        if paragraph_size <= max_tokens and size + paragraph_size > max_tokens:
+            if fresh:
+                flush()
+            if size + paragraph_size > max_tokens:
+                current, size = [], 0
+        for sentence, n in pieces:
+            if fresh and size + n > max_tokens:
+                flush()
+            while current and size + n > max_tokens:
+                size -= current.pop(0)[1]
+            current.append((sentence, n, index))
+            size += n
+            fresh = True
+
+    if fresh:
+        chunks.append(_join(current))
+    return chunks
+
+
+def chunk_pages(pages, max_tokens=CHUNK_TOKENS, overlap=CHUNK_OVERLAP, encoding_name=ENCODING_NAME):
+    """
+    Chunks a stream of (page_number, text) records page by page, so chunks
+    can be embedded while later pages are still being extracted.
+    """
+    for _, text in pages:
+        yield from chunk_text(text, max_tokens, overlap, encoding_name)
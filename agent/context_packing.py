@@ -0,0 +1,147 @@
+# ----------------------------
+# 📁 agent/context_packing.py
+# ----------------------------
+import re
+from typing import Any, Optional
+
+import numpy as np
+from langchain_core.retrievers import BaseRetriever
+from pydantic import ConfigDict
+
+from agent.embedding_cache import chunk_hash
+
+# Candidates fetched for MMR before packing
+PACK_CANDIDATES = 20
+MMR_LAMBDA = 0.7
+# Candidates at least this similar to an already packed chunk are duplicates
+DUPLICATE_SIMILARITY = 0.95
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def chunk_tokens(doc):
+    # Counted at ingest (see `agent.embedder.chunk_metadata`); older collections lack it
+    tokens = doc.metadata.get("tokens")
+    if tokens is None:
+        from agent.chunker import count_tokens
+        tokens = count_tokens(doc.page_content)
+    return tokens
+
+
+def _stored_vectors(vectorstore, docs):
+    """
+    Normalized vectors of `docs`, read back from `vectorstore` (chunk IDs are
+    content hashes) so candidates are not run through the model again. Any
+    chunk the store lacks is embedded, through the embedding cache if any.
+    """
+    ids = [chunk_hash(doc.page_content) for doc in docs]
+    stored = vectorstore.get(ids=ids, include=["embeddings"])
+    by_id = dict(zip(stored["ids"], stored["embeddings"]))
+    missing = [i for i, chunk_id in enumerate(ids) if chunk_id not in by_id]
+    if missing:
+        encoded = vectorstore.embeddings.embed_documents([docs[i].page_content for i in missing])
+        by_id.update((ids[i], vector) for i, vector in zip(missing, encoded))
+    vectors = np.asarray([by_id[chunk_id] for chunk_id in ids], dtype=np.float32)
+    return vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+
+
+def _lexical_similarity(texts):
+    # Jaccard similarity of word sets, for the keyword-only path where no embeddings exist
+    words = [set(_WORD_RE.findall(text.lower())) for text in texts]
+    sim = np.zeros((len(texts), len(texts)), dtype=np.float32)
+    for i in range(len(texts)):
+        for j in range(i + 1, len(texts)):
+            union = len(words[i] | words[j])
+            sim[i, j] = sim[j, i] = len(words[i] & words[j]) / union if union else 0.0
+    return sim
+
+
+def mmr_order(relevance, similarity, lambda_mult=MMR_LAMBDA, duplicate=DUPLICATE_SIMILARITY):
+    """
+    Orders candidates by maximal marginal relevance, dropping any candidate
+    at least `duplicate` similar to one already chosen.
+
+    Returns:
+        Candidate indexes, best first
+    """
+    remaining = list(range(len(relevance)))
+    chosen = []
+    while remaining:
+        if chosen:
+            redundancy = similarity[np.ix_(remaining, chosen)].max(axis=1)
+        else:
+            redundancy = np.zeros(len(remaining))
+        scores = lambda_mult * relevance[remaining] - (1 - lambda_mult) * redundancy
+        best = int(np.argmax(scores))
+        index = remaining.pop(best)
+        if redundancy[best] < duplicate:
+            chosen.append(index)
+    return chosen
+
+
+def pack(docs, token_budget, max_chunks=None):
+    """
+    Greedily takes `docs` in order while they fit in `token_budget`; a chunk
+    too large for what is left is skipped in favour of smaller ones after it.
+
+    Returns:
+        (packed docs, tokens used)
+    """
+    packed, used = [], 0
+    for doc in docs:
+        tokens = chunk_tokens(doc)
+        if used + tokens > token_budget:
+            continue
+        packed.append(doc)
+        used += tokens
+        if max_chunks and len(packed) >= max_chunks:
+            break
+    return packed, used
+
+
+class PackedRetriever(BaseRetriever):
+    """
+    Retriever stage in front of the LLM. It takes the candidates from `base`
+    (dense or hybrid, fetched generously), removes near-duplicates and
+    reorders them with MMR, then packs chunks greedily up to `token_budget`.
+
+    With a `vectorstore`, MMR uses the vectors it already stores for the
+    candidates, and the query vector the base retriever just computed (the
+    embedder keeps recent queries); without one, word overlap. `last_report`
+    describes the latest query.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    base: Any
+    token_budget: int
+    vectorstore: Optional[Any] = None
+    lambda_mult: float = MMR_LAMBDA
+    max_chunks: Optional[int] = None
+    last_report: Optional[dict] = None
+
+    def _get_relevant_documents(self, query, *, run_manager=None):
+        candidates = self.base.invoke(query)
+        if not candidates:
+            self.last_report = {"candidates": 0, "chunks": 0, "context_tokens": 0, "budget": self.token_budget}
+            return []
+
+        if self.vectorstore is not None:
+            vectors = _stored_vectors(self.vectorstore, candidates)
+            query_vector = np.asarray(self.vectorstore.embeddings.embed_query(query), dtype=np.float32)
+            relevance = vectors @ (query_vector / max(float(np.linalg.norm(query_vector)), 1e-12))
+            similarity = vectors @ vectors.T
+        else:
+            # Candidates arrive best first; turn their rank into a relevance in (0, 1]
+            relevance = 1.0 - np.arange(len(candidates)) / len(candidates)
+            similarity = _lexical_similarity([doc.page_content for doc in candidates])
+
+        order = mmr_order(relevance, similarity, self.lambda_mult)
+        packed, used = pack([candidates[i] for i in order], self.token_budget, self.max_chunks)
+        self.last_report = {
+            "candidates": len(candidates),
+            "chunks": len(packed),
+            "context_tokens": used,
+            "budget": self.token_budget,
+        }
+        return packed
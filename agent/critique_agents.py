@@ -1,15 +1,16 @@
 # ------------------------------
 # ✅ Updated critique_agents.py
 # ------------------------------
-from langchain.prompts import PromptTemplate
-from langchain_community.llms import GPT4All
-from langchain_openai import ChatOpenAI
 import os
 
-from langchain_core.runnables import RunnableLambda
 
+def _critique_prompt(openai_api_key=None, local_model_path=None):
+    """
+    Returns:
+        (prompt template, llm)
+    """
+    from langchain.prompts import PromptTemplate
 
-def run_critique_agent(persona, text, openai_api_key=None, local_model_path=None):
     template = """You are a {persona}. Given the following paper excerpt, provide a critique:
 
 {text}
@@ -24,21 +25,37 @@ Respond with a critical analysis considering clarity, originality, and methodolo
 
     # Initialize LLM
     if openai_api_key:
+        from langchain_openai import ChatOpenAI
         llm = ChatOpenAI(api_key=openai_api_key, temperature=0.7)
     elif local_model_path:
         if not os.path.exists(local_model_path):
             raise FileNotFoundError(f"❌ Model not found at {local_model_path}")
-        # Dynamically select backend
-        backend = "llama" if ".gguf" in local_model_path else "gptj"
-        llm = GPT4All(model=local_model_path, backend=backend, verbose=False)
+        from agent.llm_client import served_llm
+        llm = served_llm(local_model_path)
     else:
         raise ValueError("Missing LLM: provide OpenAI API key or local model path")
 
-    # Use Runnable prompt pipeline (recommended)
-    chain = prompt | llm
-    response = chain.invoke({"persona": persona, "text": text})
+    return prompt, llm
 
-    # Handle AIMessage type return
-    if hasattr(response, "content"):
-        return response.content
-    return str(response)
+
+def run_critique_agent(persona, text, openai_api_key=None, local_model_path=None, use_cache=True):
+    """
+    The same persona on the same excerpt is answered from the response
+    cache unless `use_cache=False`.
+    """
+    from agent.response_cache import cached_invoke
+
+    prompt, llm = _critique_prompt(openai_api_key, local_model_path)
+    return cached_invoke(llm, prompt.invoke({"persona": persona, "text": text}), use_cache)
+
+
+def stream_critique(persona, text, openai_api_key=None, local_model_path=None, use_cache=True):
+    """
+    Streaming `run_critique_agent`: returns a `TimedStream` of tokens.
+    """
+    from agent.response_cache import cached_stream
+    from agent.streaming import TimedStream
+
+    prompt, llm = _critique_prompt(openai_api_key, local_model_path)
+    tokens = cached_stream(llm, prompt.invoke({"persona": persona, "text": text}), use_cache)
+    return TimedStream(tokens, "critique")
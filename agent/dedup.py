@@ -0,0 +1,122 @@
+# -------------------------
+# 📁 agent/dedup.py
+# -------------------------
+import re
+from functools import lru_cache
+
+import mmh3
+import numpy as np
+
+DEDUP_THRESHOLD = 0.85
+NUM_PERM = 64
+SHINGLE_SIZE = 3
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+_WORD_RE = re.compile(r"\w+")
+
+
+# Missed near-duplicates cost far more than extra candidate comparisons,
+# which are verified against the full signature anyway
+LSH_FALSE_NEGATIVE_WEIGHT = 0.9
+_LSH_GRID = 200
+
+
+@lru_cache(maxsize=None)
+def _lsh_params(threshold, num_perm, false_negative_weight=LSH_FALSE_NEGATIVE_WEIGHT):
+    """
+    Picks (bands, rows) with bands * rows <= num_perm that minimise the
+    weighted area of false positives (similarity below `threshold` becoming
+    a candidate) and false negatives (similarity above it never compared),
+    as datasketch's MinHashLSH does. Weighting false negatives puts the
+    S-curve threshold below the target, e.g. 7 x 9 for 0.85 and 64 perms.
+    """
+    below = (np.arange(_LSH_GRID) + 0.5) / _LSH_GRID * threshold
+    above = threshold + (np.arange(_LSH_GRID) + 0.5) / _LSH_GRID * (1 - threshold)
+    best = None
+    for bands in range(1, num_perm + 1):
+        for rows in range(1, num_perm // bands + 1):
+            false_positive = np.mean(1 - (1 - below ** rows) ** bands) * threshold
+            false_negative = np.mean((1 - above ** rows) ** bands) * (1 - threshold)
+            error = (1 - false_negative_weight) * false_positive + false_negative_weight * false_negative
+            if best is None or error < best[0]:
+                best = (error, bands, rows)
+    return best[1], best[2]
+
+
+class MinHashDeduper:
+    """
+    Streaming near-duplicate filter: `add` returns False for a chunk whose
+    estimated Jaccard similarity to an already kept chunk reaches `threshold`.
+
+    Each chunk is only compared with the kept chunks sharing an LSH band, so
+    the work grows linearly with the number of chunks.
+    """
+
+    def __init__(self, threshold=DEDUP_THRESHOLD, num_perm=NUM_PERM, shingle_size=SHINGLE_SIZE, seed=1):
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.bands, self.rows = _lsh_params(threshold, num_perm)
+        rng = np.random.default_rng(seed)
+        # Keep a < 2**31 so a * hash (< 2**32) cannot overflow uint64
+        self._a = rng.integers(1, 1 << 31, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 31, size=num_perm, dtype=np.uint64)
+        self._buckets = [{} for _ in range(self.bands)]
+        self._signatures = []
+        self.seen = 0
+        self.removed = 0
+        self.chars_removed = 0
+
+    def _shingles(self, text):
+        words = _WORD_RE.findall(text.lower())
+        if len(words) <= self.shingle_size:
+            return {" ".join(words)}
+        return {" ".join(words[i:i + self.shingle_size]) for i in range(len(words) - self.shingle_size + 1)}
+
+    def signature(self, text):
+        hashes = np.fromiter(
+            (mmh3.hash(shingle, signed=False) for shingle in self._shingles(text)), dtype=np.uint64
+        )
+        permuted = (np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME & _MAX_HASH
+        # Values are masked to 32 bits, so uint32 halves the memory kept per chunk
+        return permuted.min(axis=0).astype(np.uint32)
+
+    def add(self, text):
+        self.seen += 1
+        signature = self.signature(text)
+        keys = [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+        candidates = set()
+        for bucket, key in zip(self._buckets, keys):
+            candidates.update(bucket.get(key, ()))
+        for index in candidates:
+            if np.mean(self._signatures[index] == signature) >= self.threshold:
+                self.removed += 1
+                self.chars_removed += len(text)
+                return False
+
+        index = len(self._signatures)
+        self._signatures.append(signature)
+        for bucket, key in zip(self._buckets, keys):
+            bucket.setdefault(key, []).append(index)
+        return True
+
+    def report(self):
+        return {
+            "chunks_in": self.seen,
+            "chunks_removed": self.removed,
+            "chars_removed": self.chars_removed,
+        }
+
+
+def dedupe_chunks(chunks, threshold=DEDUP_THRESHOLD, num_perm=NUM_PERM, shingle_size=SHINGLE_SIZE):
+    """
+    Drops near-duplicate chunks (licence text, author blocks, repeated captions)
+    before they reach the embedder, keeping the first occurrence.
+
+    Returns:
+        (kept_chunks, report)
+    """
+    deduper = MinHashDeduper(threshold, num_perm, shingle_size)
+    kept = [chunk for chunk in chunks if deduper.add(chunk)]
+    return kept, deduper.report()
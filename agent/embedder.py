@@ -1,13 +1,260 @@
 # -------------------------
 # 📁 agent/embedder.py
 # -------------------------
-from langchain_community.vectorstores import Chroma
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+import hashlib
 import os
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from agent.embedding_cache import chunk_hash
+from agent.model_registry import DEFAULT_EMBEDDING_MODEL, get_sentence_model
+
+EMBED_BATCH_SIZE = 32
+# Kept well below Chroma's max batch size, and small enough for useful progress updates
+INSERT_BATCH_SIZE = 128
+# Recent query vectors kept in memory, so retrieval and context packing encode a question once
+QUERY_MEMO_SIZE = 32
+# "memory" keeps a session-scoped NumPy index; "chroma" persists a collection
+VECTOR_STORES = ("memory", "chroma")
+# Chroma HNSW index parameters, applied when a collection is created.
+# benchmarks/bench_retrieval.py shows the recall/latency trade-off of each.
+HNSW_SETTINGS = {"M": 16, "ef_construction": 100, "ef_search": 100}
+
+
+class SharedModelEmbeddings(Embeddings):
+    """
+    LangChain embeddings over the process-wide sentence model, so every
+    upload and search reuses the weights already in memory.
+
+    With an `EmbeddingCache`, only chunks missing from the cache reach the
+    model, encoded together in one batch. With `bucket_by_length`, chunks are
+    grouped by token length so each batch pads to a similar size.
+    """
+
+    def __init__(self, model_name=DEFAULT_EMBEDDING_MODEL, cache=None, batch_size=EMBED_BATCH_SIZE,
+                 bucket_by_length=True, backend="torch", num_threads=None):
+        self.model_name = model_name
+        self.cache = cache
+        self.batch_size = batch_size
+        self.bucket_by_length = bucket_by_length
+        self.backend = backend
+        self.num_threads = num_threads
+        # Quantized vectors differ slightly, so they are cached separately
+        self.cache_key = model_name if backend == "torch" else f"{model_name}@{backend}"
+        self._queries = OrderedDict()
+        self._queries_lock = threading.Lock()
+
+    def _encode(self, texts):
+        model = get_sentence_model(self.model_name, self.backend, self.num_threads)
+        if not self.bucket_by_length or len(texts) <= self.batch_size:
+            return model.encode(texts, batch_size=self.batch_size, convert_to_numpy=True)
+
+        # Sort by tokenizer length (capped at what the model will see), encode
+        # each run of similar lengths as one batch, then scatter back in order
+        tokenized = model.tokenizer(texts, add_special_tokens=False, truncation=True,
+                                    max_length=model.max_seq_length)
+        order = np.argsort([len(ids) for ids in tokenized["input_ids"]], kind="stable")
+        vectors = np.empty((len(texts), model.get_sentence_embedding_dimension()), dtype=np.float32)
+        for start in range(0, len(order), self.batch_size):
+            bucket = order[start:start + self.batch_size]
+            vectors[bucket] = model.encode([texts[i] for i in bucket], batch_size=len(bucket),
+                                           convert_to_numpy=True)
+        return vectors
+
+    def embed_documents(self, texts):
+        texts = list(texts)
+        if self.cache is None:
+            return self._encode(texts).tolist()
+
+        vectors = self.cache.get_many(self.cache_key, texts)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            encoded = self._encode([texts[i] for i in missing])
+            self.cache.put_many(self.cache_key, [texts[i] for i in missing], encoded)
+            for i, vector in zip(missing, encoded):
+                vectors[i] = vector
+        return [vector.tolist() for vector in vectors]
+
+    def embed_query(self, text):
+        # Questions stay out of the on-disk chunk cache, which they would only
+        # fill and skew; the in-memory memo covers the repeats within one ask
+        with self._queries_lock:
+            if text in self._queries:
+                self._queries.move_to_end(text)
+                return self._queries[text]
+        vector = self._encode([text])[0].tolist()
+        with self._queries_lock:
+            self._queries[text] = vector
+            while len(self._queries) > QUERY_MEMO_SIZE:
+                self._queries.popitem(last=False)
+        return vector
+
+
+def collection_name_for(source_name, chunk_ids):
+    """
+    Names a Chroma collection after the document and a digest of its chunk
+    IDs, so the same content always lands in the same collection.
+    """
+    digest = hashlib.sha256("".join(sorted(chunk_ids)).encode("utf-8")).hexdigest()[:16]
+    # Chroma allows [a-zA-Z0-9._-], starting and ending with an alphanumeric
+    slug = re.sub(r"[^a-zA-Z0-9._-]+", "-", os.path.splitext(source_name)[0])[:48].strip("-._")
+    return f"{slug}-{digest}" if slug else f"doc-{digest}"
+
+
+def hnsw_metadata(hnsw=None):
+    """
+    Chroma collection metadata for HNSW settings; `hnsw` overrides any of
+    the keys of `HNSW_SETTINGS`.
+    """
+    settings = {**HNSW_SETTINGS, **(hnsw or {})}
+    return {
+        "hnsw:M": settings["M"],
+        "hnsw:construction_ef": settings["ef_construction"],
+        "hnsw:search_ef": settings["ef_search"],
+    }
+
+
+def open_collection(collection_name, source_name, embedder=None, persist_dir="vector_db", hnsw=None):
+    # chromadb is only loaded by sessions that persist a collection
+    from langchain_community.vectorstores import Chroma
 
-def embed_text_chunks(chunks, source_name, persist_dir="vector_db"):
     os.makedirs(persist_dir, exist_ok=True)
-    docs = [Document(page_content=chunk, metadata={"source": source_name}) for chunk in chunks]
-    embedder = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-    return Chroma.from_documents(docs, embedder, persist_directory=persist_dir)
+    return Chroma(
+        collection_name=collection_name,
+        embedding_function=embedder or SharedModelEmbeddings(),
+        persist_directory=persist_dir,
+        collection_metadata={"source": source_name, **hnsw_metadata(hnsw)},
+    )
+
+
+def open_store(store, collection_name, source_name, embedder=None, persist_dir="vector_db", hnsw=None):
+    if store == "memory":
+        from agent.numpy_store import NumpyVectorStore
+        return NumpyVectorStore(embedder or SharedModelEmbeddings())
+    if store == "chroma":
+        return open_collection(collection_name, source_name, embedder, persist_dir, hnsw)
+    raise ValueError(f"Unknown vector store: {store}")
+
+
+def _add_vectors(vectorstore, texts, vectors, metadatas, ids):
+    if hasattr(vectorstore, "add_embeddings"):
+        vectorstore.add_embeddings(texts, vectors, metadatas, ids)
+    else:
+        # LangChain's Chroma wrapper always embeds; precomputed vectors go to the collection
+        vectorstore._collection.upsert(ids=ids, embeddings=np.asarray(vectors, dtype=np.float32).tolist(),
+                                       metadatas=metadatas, documents=texts)
+
+
+def chunk_metadata(text, source_name):
+    """
+    Metadata stored with every chunk. The token count is taken once here so
+    context packing at query time never re-tokenizes chunks.
+    """
+    from agent.chunker import count_tokens
+    return {"source": source_name, "tokens": count_tokens(text)}
+
+
+def _add_chunks_pooled(vectorstore, unique, new_ids, done, total, metadatas, pool, progress):
+    embedder = vectorstore.embeddings
+    cache = getattr(embedder, "cache", None)
+    if pool.cache_key != getattr(embedder, "cache_key", pool.cache_key):
+        raise ValueError(f"Embedding pool runs {pool.cache_key}, the store expects {embedder.cache_key}")
+
+    texts = [unique[chunk_id] for chunk_id in new_ids]
+    todo = list(range(len(texts)))
+    if cache is not None:
+        cached = cache.get_many(pool.cache_key, texts)
+        hits = [i for i, vector in enumerate(cached) if vector is not None]
+        todo = [i for i, vector in enumerate(cached) if vector is None]
+        for start in range(0, len(hits), INSERT_BATCH_SIZE):
+            batch = hits[start:start + INSERT_BATCH_SIZE]
+            _add_vectors(vectorstore, [texts[i] for i in batch], [cached[i] for i in batch],
+                         [metadatas[new_ids[i]] for i in batch], [new_ids[i] for i in batch])
+        done += len(hits)
+        if progress and hits:
+            progress(done, total)
+
+    missing = [texts[i] for i in todo]
+    for start, vectors in pool.map_batches(missing):
+        batch = todo[start:start + len(vectors)]
+        batch_texts = missing[start:start + len(vectors)]
+        if cache is not None:
+            cache.put_many(pool.cache_key, batch_texts, vectors)
+        _add_vectors(vectorstore, batch_texts, vectors, [metadatas[new_ids[i]] for i in batch],
+                     [new_ids[i] for i in batch])
+        done += len(batch)
+        if progress:
+            progress(done, total)
+
+
+def add_chunks(vectorstore, chunks, source_name, progress=None, sparse_index=None, pool=None):
+    """
+    Embeds and adds the chunks a collection does not already hold. Chunk IDs
+    are content hashes, so adding the same chunk twice is a no-op. Every
+    chunk also goes into `sparse_index` (a `BM25Index`) if one is given.
+
+    With an `EmbeddingPool`, chunks are encoded by its worker processes and
+    each batch is written to the store as soon as it comes back.
+
+    Returns:
+        Number of chunks actually embedded
+    """
+    # Identical chunks share an ID; keep the first so Chroma never sees duplicates
+    unique = {}
+    for chunk in chunks:
+        unique.setdefault(chunk_hash(chunk), chunk)
+    ids = list(unique)
+    metadatas = {chunk_id: chunk_metadata(text, source_name) for chunk_id, text in unique.items()}
+    if sparse_index is not None:
+        sparse_index.add(unique.values(), [metadatas[chunk_id] for chunk_id in ids], ids)
+    existing = set(vectorstore.get(ids=ids, include=[])["ids"]) if ids else set()
+    new_ids = [chunk_id for chunk_id in ids if chunk_id not in existing]
+    if pool is not None:
+        _add_chunks_pooled(vectorstore, unique, new_ids, len(existing), len(ids), metadatas, pool, progress)
+        return len(new_ids)
+    for start in range(0, len(new_ids), INSERT_BATCH_SIZE):
+        batch = new_ids[start:start + INSERT_BATCH_SIZE]
+        vectorstore.add_texts(
+            [unique[chunk_id] for chunk_id in batch],
+            metadatas=[metadatas[chunk_id] for chunk_id in batch],
+            ids=batch,
+        )
+        if progress:
+            progress(len(existing) + start + len(batch), len(ids))
+    return len(new_ids)
+
+
+def embed_text_chunks(chunks, source_name, persist_dir="vector_db", embedding_cache=None,
+                      batch_size=EMBED_BATCH_SIZE, bucket_by_length=True, backend="torch", num_threads=None,
+                      collection_name=None, progress=None, store="chroma", hnsw=None, sparse_index=None,
+                      pool=None):
+    """
+    Embeds text chunks into a per-document collection of a persistent Chroma
+    store, or with store="memory" into a `NumpyVectorStore` for the session.
+
+    Chunk IDs are content hashes, so re-ingesting a document only embeds and
+    writes chunks the collection does not already hold.
+
+    `chunks` may be any iterable, e.g. the generator returned by
+    `agent.chunker.chunk_pages`. Pass an `EmbeddingCache` to skip re-encoding
+    chunks seen in earlier uploads or searches. `backend` selects torch or
+    onnxruntime ("onnx", "onnx-int8") inference. `progress`, if given, is
+    called with (chunks_done, chunks_total) after each inserted batch.
+    `hnsw` overrides `HNSW_SETTINGS` for a new Chroma collection. Chunks are
+    also added to `sparse_index`, if given, for hybrid retrieval.
+
+    For bulk ingestion, pass an `agent.embedding_pool.EmbeddingPool` built
+    with the same model and backend to encode across worker processes.
+    """
+    chunks = list(chunks)
+    collection_name = collection_name or collection_name_for(source_name, {chunk_hash(c) for c in chunks})
+    embedder = SharedModelEmbeddings(cache=embedding_cache, batch_size=batch_size,
+                                     bucket_by_length=bucket_by_length, backend=backend,
+                                     num_threads=num_threads)
+    vectorstore = open_store(store, collection_name, source_name, embedder, persist_dir, hnsw)
+    add_chunks(vectorstore, chunks, source_name, progress, sparse_index, pool)
+    return vectorstore
@@ -0,0 +1,117 @@
+# ----------------------------
+# 📁 agent/embedding_pool.py
+# ----------------------------
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from agent.model_registry import DEFAULT_EMBEDDING_MODEL
+
+# Chunks sent to a worker per task: large enough to amortise pickling,
+# small enough that results stream back while the rest are encoding
+POOL_TASK_SIZE = 256
+
+_embedder = None
+
+
+def physical_cores():
+    """
+    Physical cores this process may run on. SMT siblings share the vector
+    units, so they add little to matmul-bound encoding.
+    """
+    try:
+        cpus = os.sched_getaffinity(0)
+    except AttributeError:
+        return os.cpu_count() or 1
+    cores = set()
+    for cpu in cpus:
+        topology = f"/sys/devices/system/cpu/cpu{cpu}/topology"
+        try:
+            with open(os.path.join(topology, "physical_package_id")) as f:
+                package = f.read().strip()
+            with open(os.path.join(topology, "core_id")) as f:
+                core = f.read().strip()
+        except OSError:
+            return len(cpus)
+        cores.add((package, core))
+    return len(cores) or 1
+
+
+def _init_worker(model_name, backend, num_threads, batch_size):
+    # Runs once per worker process, before torch creates its thread pools
+    global _embedder
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(num_threads)
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+    import torch
+    torch.set_num_threads(num_threads)
+    torch.set_num_interop_threads(1)
+
+    from agent.embedder import SharedModelEmbeddings
+    _embedder = SharedModelEmbeddings(model_name, batch_size=batch_size, backend=backend,
+                                      num_threads=num_threads)
+    _embedder._encode(["warm up"])
+
+
+def _encode_task(start, texts):
+    return start, _embedder._encode(texts)
+
+
+class EmbeddingPool:
+    """
+    Worker processes that each hold their own copy of the sentence model and
+    encode on a pinned number of threads, for bulk ingestion on CPU-only
+    hosts. By default there is one single-threaded worker per physical core,
+    which scales better than one process running a wide torch thread pool.
+
+    Reuse one pool across a reading list: spawning workers and loading the
+    model is paid once, not per document.
+    """
+
+    def __init__(self, workers=None, threads_per_worker=None, model_name=DEFAULT_EMBEDDING_MODEL,
+                 backend="torch", batch_size=32):
+        from agent.embedder import SharedModelEmbeddings
+
+        cores = physical_cores()
+        self.threads_per_worker = threads_per_worker or 1
+        self.workers = workers or max(1, cores // self.threads_per_worker)
+        # Vectors are cached under the same key as the in-process embedder's
+        self.cache_key = SharedModelEmbeddings(model_name, backend=backend).cache_key
+        # Forking a process that already runs torch threads can deadlock
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(model_name, backend, self.threads_per_worker, batch_size),
+        )
+
+    def map_batches(self, texts, task_size=POOL_TASK_SIZE):
+        """
+        Encodes `texts` across the workers, keeping two tasks per worker in
+        flight.
+
+        Yields:
+            (start, vectors) for texts[start:start + len(vectors)], in
+            completion order
+        """
+        starts = iter(range(0, len(texts), task_size))
+        pending = set()
+        while True:
+            for start in starts:
+                pending.add(self._executor.submit(_encode_task, start, texts[start:start + task_size]))
+                if len(pending) >= 2 * self.workers:
+                    break
+            if not pending:
+                return
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+    def close(self):
+        self._executor.shutdown(cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -3,45 +3,75 @@
 # -------------------------
 
 import os
-from langchain_community.llms import GPT4All
-from langchain_openai import ChatOpenAI
 from dotenv import load_dotenv
 
 load_dotenv()
 
-def suggest_hypotheses(text, api_key=None, local_model_path=None, n=3):
-    prompt = f"""You are a research scientist. Based on the following text, suggest {n} possible research hypotheses or experimental directions:
+
+def _prompt(text, n):
+    return f"""You are a research scientist. Based on the following text, suggest {n} possible research hypotheses or experimental directions:
 
 {text[:3000]}
 
 Start each suggestion with a dash (-).
 """
 
-    try:
-        if api_key:
-            llm = ChatOpenAI(model="gpt-3.5-turbo", temperature=0.7, api_key=api_key)
 
-        elif local_model_path:
-            if not os.path.exists(local_model_path):
-                return f"❌ Local model not found: {local_model_path}"
+def _load_llm(api_key=None, local_model_path=None):
+    """
+    Returns:
+        (llm, None), or (None, error message) when no model is usable
+    """
+    if api_key:
+        from langchain_openai import ChatOpenAI
+        return ChatOpenAI(model="gpt-3.5-turbo", temperature=0.7, api_key=api_key), None
+
+    if local_model_path:
+        if not os.path.exists(local_model_path):
+            return None, f"❌ Local model not found: {local_model_path}"
+
+        from agent.llm_client import served_llm
+        return served_llm(local_model_path), None
 
-            # Auto-detect backend
-            model_lower = local_model_path.lower()
-            if "mistral" in model_lower:
-                backend = "llama"
-            elif "gpt4all-j" in model_lower or "groovy" in model_lower:
-                backend = "gptj"
-            else:
-                backend = "auto"
+    return None, "❌ No LLM source provided (OpenAI key or local model path)."
 
-            llm = GPT4All(model=local_model_path, backend=backend, verbose=False)
 
-        else:
-            return "❌ No LLM source provided (OpenAI key or local model path)."
+def suggest_hypotheses(text, api_key=None, local_model_path=None, n=3, use_cache=True):
+    """
+    `use_cache=False` asks the model for a fresh set instead of repeating the
+    cached response to the same prompt.
+    """
+    from agent.response_cache import cached_invoke
+
+    try:
+        llm, error = _load_llm(api_key, local_model_path)
+        if error:
+            return error
 
         # ✅ Fix: handle both OpenAI and GPT4All return types
-        response = llm.invoke(prompt)
-        return response.content if hasattr(response, "content") else str(response)
+        return cached_invoke(llm, _prompt(text, n), use_cache)
+
+    except Exception as e:
+        return f"❌ Error generating hypotheses: {e}"
+
 
+def _hypothesis_tokens(text, api_key, local_model_path, n, use_cache):
+    from agent.response_cache import cached_stream
+
+    try:
+        llm, error = _load_llm(api_key, local_model_path)
+        if error:
+            yield error
+            return
+        yield from cached_stream(llm, _prompt(text, n), use_cache)
     except Exception as e:
-        return f"❌ Error generating hypotheses: {e}"
\ No newline at end of file
+        yield f"❌ Error generating hypotheses: {e}"
+
+
+def stream_hypotheses(text, api_key=None, local_model_path=None, n=3, use_cache=True):
+    """
+    Streaming `suggest_hypotheses`: returns a `TimedStream` of tokens.
+    """
+    from agent.streaming import TimedStream
+
+    return TimedStream(_hypothesis_tokens(text, api_key, local_model_path, n, use_cache), "hypotheses")
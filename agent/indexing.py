@@ -0,0 +1,116 @@
+# -------------------------
+# 📁 agent/indexing.py
+# -------------------------
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from agent.pdf_parser import pdf_digest
+from agent.pipeline import ingest_pdf_pipelined
+from agent.sparse_index import BM25Index
+
+INDEXING_WORKERS = 2
+
+_executor = ThreadPoolExecutor(max_workers=INDEXING_WORKERS, thread_name_prefix="argonaut-index")
+
+
+class IndexingJob:
+    """
+    Tracks a PDF being parsed and embedded in the background.
+
+    The extracted text becomes available (`wait_text`) as soon as parsing
+    and cleaning are done, and the complete keyword index (`sparse_index`,
+    `wait_keywords`) once every chunk is cut, well ahead of the embedder;
+    the vector store (`wait`) only once every chunk is embedded.
+    """
+
+    def __init__(self, source_name):
+        self.source_name = source_name
+        self.document_id = None  # SHA-256 of the PDF, whatever the file is called
+        self.stage = "queued"
+        self.progress = 0.0
+        self.text = None
+        self.cleaning_report = None
+        self.dedup_report = None
+        self.stats = None
+        self.vectorstore = None
+        self.sparse_index = BM25Index()
+        self.error = None
+        self._text_ready = threading.Event()
+        self._keywords_ready = threading.Event()
+        self._done = threading.Event()
+
+    @property
+    def ready(self):
+        return self._done.is_set() and self.error is None
+
+    @property
+    def keywords_ready(self):
+        return self._keywords_ready.is_set() and self.error is None
+
+    @property
+    def failed(self):
+        return self.error is not None
+
+    def wait_text(self, timeout=None):
+        self._text_ready.wait(timeout)
+        if self.error is not None:
+            raise self.error
+        return self.text
+
+    def wait_keywords(self, timeout=None):
+        self._keywords_ready.wait(timeout)
+        if self.error is not None:
+            raise self.error
+        return self.sparse_index
+
+    def wait(self, timeout=None):
+        self._done.wait(timeout)
+        if self.error is not None:
+            raise self.error
+        return self.vectorstore
+
+    def _on_progress(self, done, total):
+        self.progress = done / total if total else 1.0
+
+
+def _index_pdf(job, file, parse_cache, embedding_cache, drop_references, backend, store):
+    def on_text(text):
+        job.text = text
+        job.stage = "embedding"
+        job._text_ready.set()
+
+    try:
+        job.document_id = pdf_digest(file)
+        job.stage = "extracting"
+        job.vectorstore, stats = ingest_pdf_pipelined(
+            file, job.source_name, parse_cache=parse_cache, embedding_cache=embedding_cache,
+            drop_references=drop_references, backend=backend, on_text=on_text, progress=job._on_progress,
+            store=store, sparse_index=job.sparse_index, document_id=job.document_id,
+            on_chunks=job._keywords_ready.set,
+        )
+        job.cleaning_report = stats["cleaning"]
+        job.dedup_report = stats["dedup"]
+        job.stats = stats
+        job.progress = 1.0
+        job.stage = "ready"
+    except Exception as e:
+        job.error = e
+        job.stage = "failed"
+    finally:
+        job._text_ready.set()
+        job._keywords_ready.set()
+        job._done.set()
+
+
+def start_pdf_indexing(file, source_name, parse_cache=None, embedding_cache=None, drop_references=True,
+                       backend="torch", store="chroma"):
+    """
+    Parses, cleans, chunks and embeds an uploaded PDF on a background thread,
+    through the pipelined ingester.
+
+    Returns:
+        IndexingJob to poll or wait on
+    """
+    job = IndexingJob(source_name)
+    _executor.submit(_index_pdf, job, file, parse_cache, embedding_cache, drop_references, backend, store)
+    return job
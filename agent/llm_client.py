@@ -0,0 +1,58 @@
+# ------------------------
+# 📁 agent/llm_client.py
+# ------------------------
+from typing import Any, Dict, Optional
+
+from langchain_core.language_models.llms import LLM
+from langchain_core.outputs import GenerationChunk
+from pydantic import Field
+
+from agent.llm_server import LLM_REQUEST_TIMEOUT, get_llm_server
+
+
+class ServedLLM(LLM):
+    """
+    LangChain LLM that sends each prompt to the shared `LLMServer` instead of
+    loading the model in this process. Drop-in for `GPT4All` in chains.
+    """
+
+    model_path: str
+    backend: Optional[str] = None
+    params: Dict[str, Any] = Field(default_factory=dict)
+    timeout: float = LLM_REQUEST_TIMEOUT
+
+    @property
+    def _llm_type(self):
+        return "gpt4all-served"
+
+    @property
+    def _identifying_params(self):
+        return {"model_path": self.model_path, "backend": self.backend, **self.params}
+
+    def _call(self, prompt, stop=None, run_manager=None, **kwargs):
+        request = get_llm_server().submit(self.model_path, prompt, stop=stop, backend=self.backend,
+                                          timeout=self.timeout, **self.params)
+        try:
+            return request.result()
+        finally:
+            # Interrupted while waiting: free the queue slot (or the running generation)
+            if not request.done:
+                request.cancel()
+
+    def _stream(self, prompt, stop=None, run_manager=None, **kwargs):
+        request = get_llm_server().submit(self.model_path, prompt, stop=stop, backend=self.backend,
+                                          timeout=self.timeout, stream=True, **self.params)
+        try:
+            for token in request.stream():
+                chunk = GenerationChunk(text=token)
+                if run_manager:
+                    run_manager.on_llm_new_token(token, chunk=chunk)
+                yield chunk
+        finally:
+            # Closed early (e.g. the Streamlit script was stopped): stop generating
+            if not request.done:
+                request.cancel()
+
+
+def served_llm(model_path, backend=None, timeout=LLM_REQUEST_TIMEOUT, **params):
+    return ServedLLM(model_path=model_path, backend=backend, params=params, timeout=timeout)
@@ -0,0 +1,135 @@
+# --------------------------
+# 📁 agent/llm_registry.py
+# --------------------------
+import gc
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# GGUF weights are memory-mapped, so a resident model costs about its file size
+LLM_MEMORY_BUDGET = 8 * 1024 ** 3
+LLM_IDLE_TIMEOUT = 15 * 60
+
+
+def detect_backend(model_path):
+    name = os.path.basename(model_path).lower()
+    if name.endswith(".gguf") or "mistral" in name:
+        return "llama"
+    if "gpt4all-j" in name or "groovy" in name:
+        return "gptj"
+    return "auto"
+
+
+class LLMRegistry:
+    """
+    Keeps loaded GPT4All models resident across calls, keyed by (path,
+    backend, params). Least recently used models are unloaded once the
+    resident weights would exceed `max_bytes`, and any model unused for
+    `idle_timeout` seconds is unloaded by a background sweep.
+
+    An unloaded model is only dropped from the registry; a call still
+    generating with it keeps it alive until it returns.
+    """
+
+    def __init__(self, max_bytes=LLM_MEMORY_BUDGET, idle_timeout=LLM_IDLE_TIMEOUT):
+        self.max_bytes = max_bytes
+        self.idle_timeout = idle_timeout
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._models = OrderedDict()  # key -> [llm, size, last_used], oldest first
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self._reaper = None
+
+    def get(self, model_path, backend=None, **params):
+        """
+        Returns the resident LangChain `GPT4All` for `model_path`, loading it
+        on first use. `params` are passed to the constructor (e.g. n_threads).
+        """
+        path = os.path.abspath(model_path)
+        backend = backend or detect_backend(path)
+        key = (path, backend, tuple(sorted(params.items())))
+        with self._lock:
+            entry = self._touch(key)
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+        if entry is not None:
+            return entry[0]
+
+        # Concurrent sessions asking for the same model wait for one load
+        with load_lock:
+            with self._lock:
+                entry = self._touch(key)
+            if entry is not None:
+                return entry[0]
+            from langchain_community.llms import GPT4All
+
+            size = os.path.getsize(path)
+            with self._lock:
+                self.misses += 1
+                self._evict(self.max_bytes - size)
+            llm = GPT4All(model=path, backend=backend, verbose=False, **params)
+            with self._lock:
+                self._models[key] = [llm, size, time.monotonic()]
+                self._start_reaper()
+        return llm
+
+    def _touch(self, key):
+        entry = self._models.get(key)
+        if entry is not None:
+            self.hits += 1
+            entry[2] = time.monotonic()
+            self._models.move_to_end(key)
+        return entry
+
+    def _evict(self, max_bytes):
+        while self._models and sum(size for _, size, _ in self._models.values()) > max_bytes:
+            self._models.popitem(last=False)
+            self.evictions += 1
+        gc.collect()
+
+    def _sweep(self):
+        now = time.monotonic()
+        with self._lock:
+            idle = [key for key, (_, _, last_used) in self._models.items() if now - last_used > self.idle_timeout]
+            for key in idle:
+                del self._models[key]
+                self.evictions += 1
+        if idle:
+            gc.collect()
+
+    def _start_reaper(self):
+        if self._reaper is not None or not self.idle_timeout:
+            return
+
+        def reap():
+            while True:
+                time.sleep(max(1.0, min(60.0, self.idle_timeout / 4)))
+                self._sweep()
+
+        self._reaper = threading.Thread(target=reap, name="llm-reaper", daemon=True)
+        self._reaper.start()
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+        gc.collect()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "loaded": len(self._models),
+                "bytes": sum(size for _, size, _ in self._models.values()),
+            }
+
+
+# Shared by every Streamlit session in the process
+llm_registry = LLMRegistry()
+
+
+def get_local_llm(model_path, backend=None, **params):
+    return llm_registry.get(model_path, backend, **params)
@@ -0,0 +1,312 @@
+# ------------------------
+# 📁 agent/llm_server.py
+# ------------------------
+import itertools
+import multiprocessing
+import queue
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import CancelledError
+
+from agent.llm_registry import LLM_IDLE_TIMEOUT, LLM_MEMORY_BUDGET
+
+# "fair" round-robins between sessions (FIFO within each); "fifo" is global arrival order
+LLM_SCHEDULING = "fair"
+# Seconds a request may spend queued plus generating before it is abandoned
+LLM_REQUEST_TIMEOUT = 300
+_WAIT_WINDOW = 100
+
+
+def _serve(requests, responses, cancelled, max_bytes, idle_timeout):
+    # Runs in the server process, which is the only one holding model weights
+    from agent.llm_registry import LLMRegistry
+
+    registry = LLMRegistry(max_bytes, idle_timeout)
+    while True:
+        message = requests.get()
+        if message is None:
+            return
+        request_id, model_path, backend, params, prompt, stop, deadline, stream = message
+        stop = stop or ()
+        # Text that could still turn into a stop sequence is held back from the stream
+        hold = max(map(len, stop), default=1) - 1
+        text, emitted, stopped = "", 0, False
+
+        def on_token(token_id, response):
+            nonlocal text, emitted, stopped
+            start = max(0, len(text) - hold)
+            text += response
+            cut = min((i for i in (text.find(s, start) for s in stop) if i >= 0), default=-1)
+            if cut >= 0:
+                text, stopped = text[:cut], True
+            ready = len(text) if stopped else len(text) - hold
+            if stream and ready > emitted:
+                responses.put((request_id, "token", text[emitted:ready], None))
+                emitted = ready
+            # gpt4all stops generating as soon as this returns False
+            return not stopped and cancelled.value != request_id and time.time() < deadline
+
+        try:
+            llm = registry.get(model_path, backend, **params)
+            llm.client.generate(prompt, **{**llm._default_params(), "streaming": False, "callback": on_token})
+            if stream and len(text) > emitted:
+                responses.put((request_id, "token", text[emitted:], None))
+            if cancelled.value == request_id:
+                status = "cancelled"
+            elif time.time() >= deadline:
+                status = "expired"
+            else:
+                status = "ok"
+            responses.put((request_id, status, text, registry.stats()))
+        except Exception as e:
+            responses.put((request_id, "error", f"{type(e).__name__}: {e}", registry.stats()))
+
+
+def _current_session():
+    # Streamlit runs each browser session's script on its own thread with a run context
+    if "streamlit" in sys.modules:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+        ctx = get_script_run_ctx()
+        if ctx is not None:
+            return ctx.session_id
+    return threading.get_ident()
+
+
+class LLMRequest:
+    """
+    Handle on one prompt submitted to an `LLMServer`.
+    """
+
+    def __init__(self, server, request_id, session, payload, deadline):
+        self.id = request_id
+        self.session = session
+        self.payload = payload
+        self.deadline = deadline
+        self.submitted = time.time()
+        self.started = None
+        self.first_token = None
+        self.status = "queued"
+        self.text = None
+        self._server = server
+        self._done = threading.Event()
+        self._tokens = queue.Queue()
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    @property
+    def wait_time(self):
+        return (self.started or time.time()) - self.submitted
+
+    def cancel(self):
+        self._server.cancel(self)
+
+    def result(self, timeout=None):
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"LLM request {self.id} is still {self.status}")
+        if self.status == "ok":
+            return self.text
+        if self.status == "cancelled":
+            raise CancelledError(f"LLM request {self.id} was cancelled")
+        if self.status == "expired":
+            raise TimeoutError(f"LLM request {self.id} missed its deadline")
+        raise RuntimeError(f"❌ Local model failed: {self.text}")
+
+    def stream(self):
+        """
+        Yields text pieces as they are generated (submit with stream=True),
+        then raises like `result` if the request did not complete.
+        """
+        while True:
+            token = self._tokens.get()
+            if token is None:
+                break
+            yield token
+        self.result()
+
+    def _finish(self, status, text=None):
+        self.status, self.text = status, text
+        self._done.set()
+        self._tokens.put(None)
+
+
+class LLMServer:
+    """
+    Owns the local models in one dedicated process, so every Streamlit
+    session shares a single copy of the weights and generations never
+    compete for the same cores.
+
+    Requests are queued here and sent to the process one at a time. With
+    the "fair" policy, sessions take turns, so one user's burst of calls
+    cannot starve the others. A request that is cancelled or past its
+    deadline is dropped from the queue, or stopped mid-generation if it is
+    already running.
+    """
+
+    def __init__(self, max_bytes=LLM_MEMORY_BUDGET, idle_timeout=LLM_IDLE_TIMEOUT, policy=LLM_SCHEDULING):
+        if policy not in ("fair", "fifo"):
+            raise ValueError(f"Unknown scheduling policy: {policy}")
+        self.policy = policy
+        self._args = (max_bytes, idle_timeout)
+        self._ctx = multiprocessing.get_context("spawn")
+        self._queues = OrderedDict()  # session -> deque of requests, in turn order
+        self._current = None
+        self._cond = threading.Condition()
+        self._ids = itertools.count()
+        self._waits = deque(maxlen=_WAIT_WINDOW)
+        self._ttfts = deque(maxlen=_WAIT_WINDOW)
+        self._counts = {"ok": 0, "cancelled": 0, "expired": 0, "error": 0}
+        self._model_stats = {}
+        self._start_process()
+        threading.Thread(target=self._dispatch, name="llm-dispatcher", daemon=True).start()
+
+    def _start_process(self):
+        self._requests = self._ctx.Queue()
+        self._responses = self._ctx.Queue()
+        self._cancelled = self._ctx.Value("q", -1, lock=False)
+        self._process = self._ctx.Process(
+            target=_serve, name="llm-server", daemon=True,
+            args=(self._requests, self._responses, self._cancelled, *self._args),
+        )
+        self._process.start()
+
+    def _key(self, session):
+        return session if self.policy == "fair" else None
+
+    def submit(self, model_path, prompt, stop=None, backend=None, timeout=LLM_REQUEST_TIMEOUT,
+               session=None, stream=False, **params):
+        """
+        Queues `prompt` for the model at `model_path`; `params` are its
+        constructor params, as for `LLMRegistry.get`.
+
+        Returns:
+            An `LLMRequest`; call `.result()` to wait for the text, or
+            `.stream()` for its tokens when `stream` is set
+        """
+        session = session if session is not None else _current_session()
+        payload = (model_path, backend, params, prompt, stop, stream)
+        with self._cond:
+            request = LLMRequest(self, next(self._ids), session, payload, time.time() + timeout)
+            self._queues.setdefault(self._key(session), deque()).append(request)
+            self._cond.notify()
+        return request
+
+    def cancel(self, request):
+        with self._cond:
+            if self._current is request:
+                # The server process checks this between tokens
+                self._cancelled.value = request.id
+                return
+            key = self._key(request.session)
+            queued = self._queues.get(key)
+            if queued and request in queued:
+                queued.remove(request)
+                if not queued:
+                    del self._queues[key]
+                self._finish(request, "cancelled")
+
+    def cancel_session(self, session):
+        with self._cond:
+            requests = [r for q in self._queues.values() for r in q if r.session == session]
+            if self._current is not None and self._current.session == session:
+                requests.append(self._current)
+        for request in requests:
+            self.cancel(request)
+
+    def _next(self):
+        # Take the head of the first session in turn order, then send that session to the back
+        key, requests = next(iter(self._queues.items()))
+        request = requests.popleft()
+        del self._queues[key]
+        if requests:
+            self._queues[key] = requests
+        return request
+
+    def _finish(self, request, status, text=None):
+        self._counts[status] += 1
+        request._finish(status, text)
+
+    def _dispatch(self):
+        while True:
+            with self._cond:
+                while not self._queues:
+                    self._cond.wait()
+                request = self._next()
+                if time.time() >= request.deadline:
+                    self._finish(request, "expired")
+                    continue
+                request.started = time.time()
+                request.status = "running"
+                self._waits.append(request.wait_time)
+                self._current = request
+            model_path, backend, params, prompt, stop, stream = request.payload
+            self._requests.put((request.id, model_path, backend, params, prompt, stop, request.deadline, stream))
+            status, text = self._await(request)
+            with self._cond:
+                self._current = None
+                self._finish(request, status, text)
+
+    def _await(self, request):
+        while True:
+            try:
+                request_id, status, text, model_stats = self._responses.get(timeout=1.0)
+            except queue.Empty:
+                if not self._process.is_alive():
+                    # A crashed model (e.g. out of memory) must not take the queue down with it
+                    self._start_process()
+                    return "error", "local model server exited"
+                continue
+            if request_id != request.id:
+                continue
+            if status == "token":
+                if request.first_token is None:
+                    request.first_token = time.time()
+                    with self._cond:
+                        self._ttfts.append(request.first_token - request.submitted)
+                request._tokens.put(text)
+                continue
+            self._model_stats = model_stats
+            return status, text
+
+    def stats(self):
+        with self._cond:
+            waits = list(self._waits)
+            ttfts = list(self._ttfts)
+            return {
+                "queue_depth": sum(len(q) for q in self._queues.values()),
+                "running": self._current is not None,
+                **self._counts,
+                "mean_wait": sum(waits) / len(waits) if waits else 0.0,
+                "max_wait": max(waits, default=0.0),
+                "mean_ttft": sum(ttfts) / len(ttfts) if ttfts else None,
+                "models": dict(self._model_stats),
+            }
+
+    def close(self):
+        self._requests.put(None)
+        self._process.join(timeout=5)
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def get_llm_server():
+    """
+    Returns the process-wide server, starting it on first use.
+    """
+    global _server
+    if _server is None:
+        with _server_lock:
+            if _server is None:
+                _server = LLMServer()
+    return _server
+
+
+def llm_server_stats():
+    # Reports without starting the server, so the sidebar stays cheap
+    return _server.stats() if _server is not None else None
@@ -0,0 +1,64 @@
+# ----------------------------
+# 📁 agent/model_registry.py
+# ----------------------------
+import threading
+
+DEFAULT_EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+EMBEDDING_BACKENDS = ("torch", "onnx", "onnx-int8")
+
+_models = {}
+_keybert = {}
+_lock = threading.Lock()
+
+
+def _canonical_name(model_name):
+    # "all-MiniLM-L6-v2" and "sentence-transformers/all-MiniLM-L6-v2" are the same weights
+    return model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+
+
+def get_sentence_model(model_name=DEFAULT_EMBEDDING_MODEL, backend="torch", num_threads=None):
+    """
+    Returns the process-wide encoder for `model_name`, loading it on first use.
+    Safe to call from concurrent Streamlit sessions.
+
+    `backend` is "torch" (SentenceTransformer), "onnx" or "onnx-int8"
+    (onnxruntime with `num_threads` intra-op threads).
+    """
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend: {backend}")
+    name = _canonical_name(model_name)
+    key = (name, backend, num_threads if backend != "torch" else None)
+    model = _models.get(key)
+    if model is not None:
+        return model
+
+    if backend != "torch":
+        # The exporter needs the torch model, which is shared like any other
+        from agent.onnx_encoder import OnnxSentenceEncoder
+        torch_model = get_sentence_model(name)
+    with _lock:
+        model = _models.get(key)
+        if model is None:
+            if backend == "torch":
+                # Imported on first use: torch and transformers dominate cold start
+                from sentence_transformers import SentenceTransformer
+                model = SentenceTransformer(name)
+            else:
+                model = OnnxSentenceEncoder(torch_model, name, quantize=backend == "onnx-int8",
+                                            num_threads=num_threads)
+            _models[key] = model
+    return model
+
+
+def get_keybert(model_name=DEFAULT_EMBEDDING_MODEL):
+    """
+    Returns a KeyBERT extractor backed by the shared sentence model.
+    """
+    name = _canonical_name(model_name)
+    kw_model = _keybert.get(name)
+    if kw_model is None:
+        from keybert import KeyBERT
+        sentence_model = get_sentence_model(name)
+        with _lock:
+            kw_model = _keybert.setdefault(name, KeyBERT(model=sentence_model))
+    return kw_model
@@ -0,0 +1,174 @@
+# -------------------------
+# 📁 agent/numpy_store.py
+# -------------------------
+import threading
+import uuid
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+from langchain_core.vectorstores.utils import maximal_marginal_relevance
+
+
+def _normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.clip(norms, 1e-12, None)
+
+
+class NumpyVectorStore(VectorStore):
+    """
+    In-memory vector store for session-scoped corpora (one paper, a handful
+    of abstracts). Normalized float32 embeddings live in one contiguous matrix,
+    and a query is a single matmul plus `argpartition`.
+
+    Scores are cosine similarities (higher is closer). Adding an ID that is
+    already present is a no-op, matching the Chroma path.
+    """
+
+    def __init__(self, embedding):
+        self._embedding = embedding
+        self._matrix = None  # capacity grows by doubling; rows [:_size] are live
+        self._size = 0
+        self._texts = []
+        self._metadatas = []
+        self._ids = []
+        self._id_index = {}
+        self._lock = threading.Lock()
+
+    @property
+    def embeddings(self):
+        return self._embedding
+
+    def __len__(self):
+        return self._size
+
+    def _append(self, vectors):
+        needed = self._size + len(vectors)
+        if self._matrix is None:
+            self._matrix = np.empty((max(needed, 64), vectors.shape[1]), dtype=np.float32)
+        elif needed > len(self._matrix):
+            grown = np.empty((max(needed, 2 * len(self._matrix)), self._matrix.shape[1]), dtype=np.float32)
+            grown[:self._size] = self._matrix[:self._size]
+            self._matrix = grown
+        self._matrix[self._size:needed] = vectors
+        self._size = needed
+
+    def add_embeddings(self, texts, embeddings, metadatas=None, ids=None):
+        """
+        Adds precomputed embeddings, skipping IDs already in the store.
+        """
+        texts = list(texts)
+        metadatas = list(metadatas) if metadatas is not None else [{} for _ in texts]
+        ids = list(ids) if ids is not None else [uuid.uuid4().hex for _ in texts]
+        vectors = _normalize(embeddings)
+        with self._lock:
+            keep = []
+            for i, chunk_id in enumerate(ids):
+                if chunk_id in self._id_index:
+                    continue
+                self._id_index[chunk_id] = len(self._ids)
+                self._ids.append(chunk_id)
+                self._texts.append(texts[i])
+                self._metadatas.append(metadatas[i])
+                keep.append(i)
+            if keep:
+                self._append(vectors[keep])
+        return ids
+
+    def add_texts(self, texts, metadatas=None, ids=None, **kwargs):
+        texts = list(texts)
+        if not texts:
+            return []
+        ids = list(ids) if ids is not None else [uuid.uuid4().hex for _ in texts]
+        # Only embed what is not stored yet
+        new = [i for i, chunk_id in enumerate(ids) if chunk_id not in self._id_index]
+        if new:
+            metadatas = list(metadatas) if metadatas is not None else [{} for _ in texts]
+            vectors = self._embedding.embed_documents([texts[i] for i in new])
+            self.add_embeddings([texts[i] for i in new], vectors, [metadatas[i] for i in new],
+                                [ids[i] for i in new])
+        return ids
+
+    def get(self, ids=None, include=None, **kwargs):
+        # Chroma-compatible subset, used by `add_chunks` to find existing IDs
+        # and by context packing to read stored vectors
+        if ids is None:
+            ids = list(self._ids)
+        found = [chunk_id for chunk_id in ids if chunk_id in self._id_index]
+        result = {"ids": found}
+        if include is None or "documents" in include:
+            result["documents"] = [self._texts[self._id_index[i]] for i in found]
+        if include is None or "metadatas" in include:
+            result["metadatas"] = [self._metadatas[self._id_index[i]] for i in found]
+        if include is not None and "embeddings" in include:
+            with self._lock:
+                rows = [self._id_index[i] for i in found]
+                result["embeddings"] = self._matrix[rows] if rows else np.empty((0, 0), dtype=np.float32)
+        return result
+
+    def delete(self, ids=None, **kwargs):
+        if ids is None:
+            return False
+        with self._lock:
+            drop = {self._id_index[i] for i in ids if i in self._id_index}
+            if not drop:
+                return False
+            keep = [row for row in range(self._size) if row not in drop]
+            matrix = self._matrix[keep]
+            self._texts = [self._texts[row] for row in keep]
+            self._metadatas = [self._metadatas[row] for row in keep]
+            self._ids = [self._ids[row] for row in keep]
+            self._id_index = {chunk_id: row for row, chunk_id in enumerate(self._ids)}
+            self._matrix, self._size = None, 0
+            if len(keep):
+                self._append(matrix)
+        return True
+
+    def _top_k(self, query_vector, k):
+        if self._size == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        scores = self._matrix[:self._size] @ _normalize(query_vector)
+        k = min(k, self._size)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return top, scores[top]
+
+    def _document(self, row):
+        return Document(page_content=self._texts[row], metadata=self._metadatas[row], id=self._ids[row])
+
+    def similarity_search_by_vector_with_score(self, embedding, k=4):
+        rows, scores = self._top_k(embedding, k)
+        return [(self._document(row), float(score)) for row, score in zip(rows, scores)]
+
+    def similarity_search_by_vector(self, embedding, k=4, **kwargs):
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k)]
+
+    def similarity_search_with_score(self, query, k=4, **kwargs):
+        return self.similarity_search_by_vector_with_score(self._embedding.embed_query(query), k)
+
+    def similarity_search(self, query, k=4, **kwargs):
+        return [doc for doc, _ in self.similarity_search_with_score(query, k)]
+
+    def _select_relevance_score_fn(self):
+        # Cosine similarity in [-1, 1] mapped onto [0, 1]
+        return lambda score: (score + 1.0) / 2.0
+
+    def max_marginal_relevance_search_by_vector(self, embedding, k=4, fetch_k=20, lambda_mult=0.5, **kwargs):
+        rows, _ = self._top_k(embedding, fetch_k)
+        if not len(rows):
+            return []
+        chosen = maximal_marginal_relevance(
+            np.asarray(embedding, dtype=np.float32), self._matrix[rows], lambda_mult=lambda_mult, k=k
+        )
+        return [self._document(rows[i]) for i in chosen]
+
+    def max_marginal_relevance_search(self, query, k=4, fetch_k=20, lambda_mult=0.5, **kwargs):
+        embedding = self._embedding.embed_query(query)
+        return self.max_marginal_relevance_search_by_vector(embedding, k, fetch_k, lambda_mult)
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, ids=None, **kwargs):
+        store = cls(embedding)
+        store.add_texts(texts, metadatas=metadatas, ids=ids)
+        return store
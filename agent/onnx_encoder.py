@@ -0,0 +1,99 @@
+# ---------------------------
+# 📁 agent/onnx_encoder.py
+# ---------------------------
+import os
+
+import numpy as np
+import onnxruntime as ort
+import torch
+from onnxruntime.quantization import QuantType, quantize_dynamic
+
+ONNX_EXPORT_DIR = os.path.join("models", "onnx")
+
+
+def _export_paths(model_name, export_dir):
+    base = os.path.join(export_dir, model_name.replace("/", "__"))
+    return os.path.join(base, "model.onnx"), os.path.join(base, "model.int8.onnx")
+
+
+def export_onnx(sentence_model, model_name, export_dir=ONNX_EXPORT_DIR, quantize=False):
+    """
+    Exports the transformer of a SentenceTransformer to ONNX (once), and
+    optionally a dynamic int8-quantized copy of it.
+
+    Returns:
+        Path of the ONNX file to load
+    """
+    fp32_path, int8_path = _export_paths(model_name, export_dir)
+    if not os.path.exists(fp32_path):
+        os.makedirs(os.path.dirname(fp32_path), exist_ok=True)
+        transformer = sentence_model[0].auto_model.eval()
+        sample = sentence_model.tokenizer(["export sample"], return_tensors="pt")
+        input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+        dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+        dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+        with torch.no_grad():
+            torch.onnx.export(
+                transformer,
+                tuple(sample[name] for name in input_names),
+                fp32_path,
+                input_names=input_names,
+                output_names=["last_hidden_state"],
+                dynamic_axes=dynamic_axes,
+                opset_version=17,
+            )
+    if not quantize:
+        return fp32_path
+    if not os.path.exists(int8_path):
+        quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+    return int8_path
+
+
+class OnnxSentenceEncoder:
+    """
+    Runs a mean-pooling SentenceTransformer through onnxruntime on CPU.
+
+    Exposes the subset of the SentenceTransformer API the embedder uses:
+    `encode`, `tokenizer`, `max_seq_length` and `get_sentence_embedding_dimension`.
+    """
+
+    def __init__(self, sentence_model, model_name, quantize=False, num_threads=None,
+                 export_dir=ONNX_EXPORT_DIR):
+        pooling = sentence_model[1]
+        if not getattr(pooling, "pooling_mode_mean_tokens", False):
+            raise ValueError(f"❌ ONNX backend only supports mean-pooling models, not {model_name}")
+        self.tokenizer = sentence_model.tokenizer
+        self.max_seq_length = sentence_model.max_seq_length
+        self.normalize = any(type(module).__name__ == "Normalize" for module in sentence_model)
+        self._dimension = sentence_model.get_sentence_embedding_dimension()
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        path = export_onnx(sentence_model, model_name, export_dir, quantize)
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self._input_names = [i.name for i in self.session.get_inputs()]
+
+    def get_sentence_embedding_dimension(self):
+        return self._dimension
+
+    def encode(self, sentences, batch_size=32, convert_to_numpy=True, **_):
+        if isinstance(sentences, str):
+            return self.encode([sentences], batch_size)[0]
+        outputs = []
+        for start in range(0, len(sentences), batch_size):
+            batch = self.tokenizer(
+                sentences[start:start + batch_size], padding=True, truncation=True,
+                max_length=self.max_seq_length, return_tensors="np",
+            )
+            feeds = {name: batch[name].astype(np.int64) for name in self._input_names}
+            hidden = self.session.run(None, feeds)[0]
+            mask = batch["attention_mask"][..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            if self.normalize:
+                pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            outputs.append(pooled.astype(np.float32))
+        if not outputs:
+            return np.empty((0, self._dimension), dtype=np.float32)
+        return np.concatenate(outputs)
@@ -0,0 +1,102 @@
+# -------------------------
+# 📁 agent/parse_cache.py
+# -------------------------
+import json
+import os
+import threading
+
+import zstandard
+
+PARSE_CACHE_DIR = "parse_cache"
+PARSE_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+
+def pdf_cache_key(digest, skip_annotations=False):
+    """
+    Content address of an uploaded PDF: the SHA-256 hex digest of its bytes
+    plus the annotation flag, since it changes the text that comes out.
+    """
+    return f"{digest}-{int(skip_annotations)}"
+
+
+class ParseCache:
+    """
+    Disk cache of extracted per-page text, stored zstd-compressed and
+    evicted least-recently-used once the directory exceeds `max_bytes`.
+    """
+
+    def __init__(self, cache_dir=PARSE_CACHE_DIR, max_bytes=PARSE_CACHE_MAX_BYTES, level=3):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.level = level
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json.zst")
+
+    def get(self, key):
+        """
+        Returns the cached list of (page_number, text) tuples, or None.
+        """
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                blob = f.read()
+            # Bump the mtime so eviction treats this entry as recently used
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        pages = json.loads(zstandard.ZstdDecompressor().decompress(blob))
+        with self._lock:
+            self.hits += 1
+        return [tuple(page) for page in pages]
+
+    def put(self, key, pages):
+        blob = zstandard.ZstdCompressor(level=self.level).compress(json.dumps(pages).encode("utf-8"))
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(blob)
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json.zst"):
+                continue
+            try:
+                st = os.stat(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, name))
+        return entries
+
+    def _evict(self):
+        with self._lock:
+            entries = sorted(self._entries())
+            total = sum(size for _, size, _ in entries)
+            for _, size, name in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except FileNotFoundError:
+                    pass
+                total -= size
+
+    def stats(self):
+        entries = self._entries()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+        }
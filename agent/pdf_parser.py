@@ -1,11 +1,339 @@
 # -------------------------
 # 📁 agent/pdf_parser.py
 # -------------------------
+import hashlib
+import multiprocessing
+import os
+import re
+import tempfile
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from itertools import chain, islice
+
 import fitz  # PyMuPDF
+from agent.parse_cache import pdf_cache_key
+
+# Documents with at least this many pages are split across a process pool
+PARALLEL_PAGE_THRESHOLD = 200
+
+# Uploads larger than this are spooled to a temporary file and opened by path
+SPOOL_THRESHOLD = 32 * 1024 * 1024
+_COPY_BUFFER = 1024 * 1024
+
+# Only this many lines at the top and bottom of a page are header/footer candidates
+EDGE_LINES = 3
+_PAGE_NUMBER_RE = re.compile(r"^(page\s*)?\d+(\s*(of|/)\s*\d+)?$", re.IGNORECASE)
+_REFERENCES_RE = re.compile(r"^(\d+\.?\s*)?(references|bibliography|works cited|literature cited)$", re.IGNORECASE)
+_APPENDIX_RE = re.compile(r"^([a-z]\.?\s*)?(appendix|appendices|supplementary( material)?)\b", re.IGNORECASE)
+# "Chapter 3", "Part II", "4 Results", "2.1 Data Collection": ends a per-chapter references run
+_SECTION_RE = re.compile(r"^(?i:chapter|part)\s+(\d+|[IVXLC]+)\b|^\d{1,2}(\.\d{1,2})*\.?\s+[A-Z][A-Za-z -]{2,60}$")
+# Bibliography entries: "[12] ...", "12. ...", a year, or "et al."
+_CITATION_RE = re.compile(r"^\[\d+\]|^\d+\.\s|\b(19|20)\d{2}[a-z]?\b|\bet al\.", re.IGNORECASE)
+# Of the first few non-empty lines after a References heading, this many must look like entries
+CITATION_LOOKAHEAD = 5
+MIN_CITATION_LINES = 2
+_HYPHEN_BREAK_RE = re.compile(r"(?<=[a-z])-\n(?=[a-z])")
+
+# Plain "text" extraction never outputs or decodes images, whatever the flags
+_TEXT_FLAGS = fitz.TEXTFLAGS_TEXT
+
+
+def _page_text(page, skip_annotations=False):
+    if skip_annotations:
+        # A display list built without annotations only replays the page contents
+        textpage = page.get_displaylist(annots=False).get_textpage(_TEXT_FLAGS)
+        return textpage.extractText()
+    return page.get_text("text", flags=_TEXT_FLAGS)
+
+
+def _open_document(source):
+    # `source` is either the PDF bytes or the path of a spooled copy
+    if isinstance(source, str):
+        return fitz.open(source, filetype="pdf")
+    return fitz.open(stream=source, filetype="pdf")
+
+
+def _upload_size(file):
+    size = getattr(file, "size", None)
+    if size is not None:
+        return size
+    position = file.tell()
+    size = file.seek(0, os.SEEK_END) - position
+    file.seek(position)
+    return size
+
+
+def pdf_digest(file):
+    """
+    SHA-256 hex digest of an upload, read in blocks and rewound afterwards.
+    """
+    position = file.tell()
+    sha = hashlib.sha256()
+    while block := file.read(_COPY_BUFFER):
+        sha.update(block)
+    file.seek(position)
+    return sha.hexdigest()
+
+
+@contextmanager
+def _spool_upload(file, spool_threshold=SPOOL_THRESHOLD, digest=None):
+    """
+    Hands an upload to PyMuPDF without an extra in-memory copy when it is large.
+
+    Yields:
+        (source, digest) where source is bytes for small uploads or a temporary
+        file path for large ones, and digest is the SHA-256 of the content
+        (only computed if not given)
+    """
+    if _upload_size(file) <= spool_threshold:
+        data = file.read()
+        yield data, digest or hashlib.sha256(data).hexdigest()
+        return
+
+    sha = hashlib.sha256() if digest is None else None
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
+        try:
+            while block := file.read(_COPY_BUFFER):
+                if sha is not None:
+                    sha.update(block)
+                tmp.write(block)
+        except BaseException:
+            os.remove(tmp.name)
+            raise
+    try:
+        yield tmp.name, digest or sha.hexdigest()
+    finally:
+        os.remove(tmp.name)
+
+
+def _extract_page_range(source, start, stop, skip_annotations=False):
+    # Runs inside a worker process, which opens its own copy of the document
+    with _open_document(source) as doc:
+        return [(i + 1, _page_text(doc[i], skip_annotations)) for i in range(start, stop)]
+
+
+def _page_ranges(page_count, parts):
+    size, extra = divmod(page_count, parts)
+    start = 0
+    for i in range(parts):
+        stop = start + size + (1 if i < extra else 0)
+        if stop > start:
+            yield start, stop
+        start = stop
+
+
+@contextmanager
+def _source_path(source):
+    # Workers get a path, so the PDF bytes are not pickled once per worker
+    if isinstance(source, str):
+        yield source
+        return
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
+        tmp.write(source)
+    try:
+        yield tmp.name
+    finally:
+        os.remove(tmp.name)
+
+
+def _iter_pages_parallel(source, page_count, workers, skip_annotations):
+    ranges = list(_page_ranges(page_count, workers))
+    # Indexing runs on a background thread of a process that already has
+    # Streamlit, torch and LLM threads; forking it can deadlock
+    context = multiprocessing.get_context("spawn")
+    with _source_path(source) as path, ProcessPoolExecutor(max_workers=len(ranges), mp_context=context) as pool:
+        futures = [
+            pool.submit(_extract_page_range, path, start, stop, skip_annotations)
+            for start, stop in ranges
+        ]
+        # Futures are consumed in submission order, so pages come back in order
+        for future in futures:
+            yield from future.result()
+
+
+def _iter_document_pages(source, skip_annotations, workers, parallel_threshold, report):
+    workers = workers or os.cpu_count() or 1
+    with _open_document(source) as doc:
+        page_count = report["page_count"] = doc.page_count
+        if workers < 2 or page_count < parallel_threshold:
+            for page in doc:
+                yield page.number + 1, _page_text(page, skip_annotations)
+            return
+    yield from _iter_pages_parallel(source, page_count, workers, skip_annotations)
+
+
+def iter_pdf_pages(file, skip_annotations=False, workers=None,
+                   parallel_threshold=PARALLEL_PAGE_THRESHOLD, cache=None,
+                   spool_threshold=SPOOL_THRESHOLD, digest=None, report=None):
+    """
+    Streams the text of a PDF one page at a time.
+
+    Uploads above `spool_threshold` bytes are spooled to a temporary file so
+    PyMuPDF reads them from disk instead of from a full in-memory copy.
+    Documents with at least `parallel_threshold` pages are extracted by
+    `workers` processes (default: one per CPU), each opening its own copy.
+    If a `ParseCache` is given, a repeat upload of the same bytes is served
+    from it without opening the PDF at all. A `digest` already taken with
+    `pdf_digest` saves hashing the upload a second time. `report`, if
+    given, gets the document's `page_count` before the first page arrives.
+
+    Yields:
+        (page_number, text) tuples, page numbers starting at 1
+    """
+    report = {} if report is None else report
+    with _spool_upload(file, spool_threshold, digest) as (source, digest):
+        if cache is None:
+            yield from _iter_document_pages(source, skip_annotations, workers, parallel_threshold, report)
+            return
+
+        key = pdf_cache_key(digest, skip_annotations)
+        cached = cache.get(key)
+        if cached is not None:
+            report["page_count"] = len(cached)
+            yield from cached
+            return
+
+        pages = []
+        for record in _iter_document_pages(source, skip_annotations, workers, parallel_threshold, report):
+            pages.append(record)
+            yield record
+        cache.put(key, pages)
+
+
+def iter_page_lines(pages):
+    """
+    Splits a stream of (page_number, text) records into line chunks,
+    so the embedder can consume pages as they are extracted.
+    """
+    for _, text in pages:
+        yield from text.split("\n")
+
+
+def _edge_key(line):
+    # Digits vary between pages ("Page 3", "Page 4") so they are masked out
+    return re.sub(r"\d+", "#", line.strip().lower())
+
+
+def _edge_indexes(lines):
+    filled = [i for i, line in enumerate(lines) if line.strip()]
+    # Short pages get fewer candidates so their body text is not mistaken for margins
+    n = max(1, min(EDGE_LINES, len(filled) // 4))
+    return set(filled[:n] + filled[-n:])
+
+
+def _count_chunks(pages, chunker):
+    return sum(1 for _ in chunker(pages))
+
+
+def _repeated_edge_lines(page_lines, min_repeat_ratio):
+    # A header/footer is an edge line that recurs on a large share of the pages
+    seen = Counter()
+    for lines in page_lines:
+        seen.update({_edge_key(lines[i]) for i in _edge_indexes(lines)})
+    min_pages = max(3, int(len(page_lines) * min_repeat_ratio))
+    return {key for key, count in seen.items() if count >= min_pages}
+
+
+def _is_references_heading(lines, i):
+    # A table of contents line ("2 References") is followed by more outline, not by entries
+    if not _REFERENCES_RE.match(lines[i].strip()):
+        return False
+    following = [line for line in lines[i + 1:] if line.strip()][:CITATION_LOOKAHEAD]
+    return sum(1 for line in following if _CITATION_RE.search(line.strip())) >= MIN_CITATION_LINES
+
+
+def _clean_lines(lines, repeated, drop_references=False, in_references=False):
+    """
+    Returns:
+        (text, in_references, references_chars) for one page
+    """
+    edges = _edge_indexes(lines)
+    kept = []
+    references_chars = 0
+    for i, line in enumerate(lines):
+        stripped = line.strip()
+        if drop_references and not in_references and _is_references_heading(lines, i):
+            in_references = True
+        elif in_references and (_APPENDIX_RE.match(stripped) or _SECTION_RE.match(stripped)):
+            in_references = False
+        if in_references:
+            references_chars += len(line) + 1
+            continue
+        if i in edges and (_edge_key(line) in repeated or _PAGE_NUMBER_RE.match(stripped)):
+            continue
+        kept.append(line)
+    return _HYPHEN_BREAK_RE.sub("", "\n".join(kept)), in_references, references_chars
+
+
+def clean_pages(pages, drop_references=True, min_repeat_ratio=0.5, chunker=iter_page_lines):
+    """
+    Removes boilerplate from extracted pages before they are embedded or prompted:
+    running headers and footers repeated across pages, bare page numbers,
+    line-break hyphenation and, optionally, references sections. A references
+    section runs from a References heading followed by bibliography entries
+    to the next appendix, chapter or numbered section heading, so a thesis
+    with references after every chapter keeps the chapters in between.
+
+    Returns:
+        (pages, report) where pages is a list of (page_number, text) tuples and
+        report counts the characters and `chunker` chunks that were removed
+    """
+    pages = list(pages)
+    page_lines = [text.split("\n") for _, text in pages]
+    repeated = _repeated_edge_lines(page_lines, min_repeat_ratio)
+
+    cleaned = []
+    in_references = False
+    references_chars = 0
+    for (page_number, _), lines in zip(pages, page_lines):
+        text, in_references, removed = _clean_lines(lines, repeated, drop_references, in_references)
+        references_chars += removed
+        cleaned.append((page_number, text))
+
+    chars_before = sum(len(text) for _, text in pages)
+    chars_after = sum(len(text) for _, text in cleaned)
+    report = {
+        "chars_removed": chars_before - chars_after,
+        "chunks_removed": _count_chunks(pages, chunker) - _count_chunks(cleaned, chunker),
+        "repeated_lines": len(repeated),
+        "references_chars": references_chars,
+    }
+    return cleaned, report
+
+
+def iter_clean_pages(pages, drop_references=True, min_repeat_ratio=0.5, sample_pages=8, report=None,
+                     chunker=iter_page_lines):
+    """
+    Streaming variant of `clean_pages` for pipelined ingestion.
+
+    Running headers are learned from the first `sample_pages` pages;
+    references sections are found page by page exactly as `clean_pages`
+    finds them. Documents no longer than the sample are cleaned exactly
+    like `clean_pages`. `report`, if given, is filled in as
+    pages go by, counting `chunker` chunks page by page.
+    """
+    report = {} if report is None else report
+    pages = iter(pages)
+    sample = list(islice(pages, sample_pages))
+    if len(sample) < sample_pages:
+        cleaned, batch_report = clean_pages(sample, drop_references, min_repeat_ratio, chunker)
+        report.update(batch_report)
+        yield from cleaned
+        return
+
+    repeated = _repeated_edge_lines([text.split("\n") for _, text in sample], min_repeat_ratio)
+    report.update(chars_removed=0, chunks_removed=0, repeated_lines=len(repeated), references_chars=0)
+    in_references = False
+    for page_number, text in chain(sample, pages):
+        cleaned, in_references, removed = _clean_lines(text.split("\n"), repeated, drop_references, in_references)
+        report["chars_removed"] += len(text) - len(cleaned)
+        report["references_chars"] += removed
+        if cleaned != text:
+            report["chunks_removed"] += (_count_chunks([(page_number, text)], chunker)
+                                         - _count_chunks([(page_number, cleaned)], chunker))
+        yield page_number, cleaned
+
 
-def parse_pdf(file):
-    doc = fitz.open(stream=file.read(), filetype="pdf")
-    text = ""
-    for page in doc:
-        text += page.get_text()
-    return text
\ No newline at end of file
+def parse_pdf(file, **kwargs):
+    return "".join(text for _, text in iter_pdf_pages(file, **kwargs))
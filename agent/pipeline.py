@@ -0,0 +1,173 @@
+# -------------------------
+# 📁 agent/pipeline.py
+# -------------------------
+import queue
+import threading
+import time
+
+from agent.chunker import chunk_pages, chunk_text
+from agent.dedup import MinHashDeduper
+from agent.embedder import SharedModelEmbeddings, add_chunks, chunk_metadata, collection_name_for, open_store
+from agent.pdf_parser import iter_clean_pages, iter_pdf_pages, pdf_digest
+
+PIPELINE_QUEUE_SIZE = 32
+PIPELINE_BATCH_SIZE = 64
+
+_DONE = object()
+
+
+def _produce(items, out_queue, stop, errors):
+    # Runs a stage on its own thread; `stop` lets it give up when a later stage failed
+    try:
+        for item in items:
+            while True:
+                try:
+                    out_queue.put(item, timeout=0.1)
+                    break
+                except queue.Full:
+                    if stop.is_set():
+                        return
+    except Exception as e:
+        errors.append(e)
+    finally:
+        while not stop.is_set():
+            try:
+                out_queue.put(_DONE, timeout=0.1)
+                break
+            except queue.Full:
+                pass
+
+
+def _drain(in_queue, stop):
+    while True:
+        try:
+            item = in_queue.get(timeout=0.1)
+        except queue.Empty:
+            if stop.is_set():
+                return
+            continue
+        if item is _DONE:
+            return
+        yield item
+
+
+def ingest_pdf_pipelined(file, source_name, persist_dir="vector_db", parse_cache=None, embedding_cache=None,
+                         drop_references=True, backend="torch", batch_size=PIPELINE_BATCH_SIZE,
+                         queue_size=PIPELINE_QUEUE_SIZE, on_text=None, progress=None, store="chroma",
+                         hnsw=None, sparse_index=None, document_id=None, on_chunks=None):
+    """
+    Ingests a PDF with extraction, cleaning, chunking/dedup and embedding
+    running concurrently, connected by queues. Chunks from early pages are
+    embedded and inserted in batches while later pages are still being
+    extracted.
+
+    `on_text` is called with the full cleaned text as soon as extraction and
+    cleaning finish, however far behind the embedder is; `progress` with
+    (chunks_embedded, expected_chunks) after each batch, where the expected
+    total is projected from the pages chunked so far until chunking ends. `store` and `hnsw`
+    are as for `embed_text_chunks`. Chunks go into `sparse_index` as soon as
+    they are cut, and `on_chunks` is called once the last one is in, so the
+    keyword index is complete long before the embeddings are.
+
+    The collection is keyed on `document_id` (the SHA-256 of the file,
+    hashed here if not given), the cleaning settings and the embedding
+    model, so differently processed copies of a PDF never share a store.
+
+    Returns:
+        (vectorstore, stats)
+    """
+    started = time.perf_counter()
+    embedder = SharedModelEmbeddings(cache=embedding_cache, backend=backend)
+    document_id = document_id or pdf_digest(file)
+    collection_name = collection_name_for(
+        source_name, [document_id, f"drop_references={drop_references}", f"embedding={embedder.cache_key}"]
+    )
+    vectorstore = open_store(store, collection_name, source_name, embedder, persist_dir, hnsw)
+
+    page_queue = queue.Queue(maxsize=queue_size)
+    # Unbounded: cleaned text is held in full for `on_text` anyway, and
+    # cleaning must not wait on the embedder before it can report the text
+    clean_queue = queue.Queue()
+    # Also unbounded, for the same reason: chunking (and so the keyword index)
+    # finishes without waiting on the embedder; the chunks take about as much
+    # memory as the cleaned text
+    chunk_queue = queue.Queue()
+    stop = threading.Event()
+    errors = []
+    cleaning_report = {}
+    deduper = MinHashDeduper()
+    extract_report = {}
+    chunked = threading.Event()
+    stats = {"chunks_produced": 0, "chunks_embedded": 0, "pages_chunked": 0, "cleaning": cleaning_report}
+
+    def expected_chunks():
+        produced = stats["chunks_produced"]
+        page_count = extract_report.get("page_count")
+        if chunked.is_set() or not page_count or not stats["pages_chunked"]:
+            return produced
+        # Chunking runs ahead of the embedder, so this settles early in the ingest
+        return max(produced, round(produced * page_count / stats["pages_chunked"]))
+
+    def clean_stage():
+        texts = []
+        pages = iter_clean_pages(_drain(page_queue, stop), drop_references, report=cleaning_report,
+                                 chunker=chunk_pages)
+        for _, text in pages:
+            texts.append(text)
+            yield text
+        stats["extract_seconds"] = time.perf_counter() - started
+        if on_text and not errors:
+            on_text("".join(texts))
+
+    def chunk_stage():
+        for text in _drain(clean_queue, stop):
+            for chunk in chunk_text(text):
+                if deduper.add(chunk):
+                    stats["chunks_produced"] += 1
+                    if sparse_index is not None:
+                        sparse_index.add([chunk], [chunk_metadata(chunk, source_name)])
+                    yield chunk
+            stats["pages_chunked"] += 1
+        chunked.set()
+        if on_chunks and not errors and not stop.is_set():
+            on_chunks()
+
+    # The digest is known by now, so the upload is not hashed again while spooling
+    extracted = iter_pdf_pages(file, cache=parse_cache, digest=document_id, report=extract_report)
+    threads = [
+        threading.Thread(target=_produce, args=(extracted, page_queue, stop, errors),
+                         name="argonaut-extract", daemon=True),
+        threading.Thread(target=_produce, args=(clean_stage(), clean_queue, stop, errors),
+                         name="argonaut-clean", daemon=True),
+        threading.Thread(target=_produce, args=(chunk_stage(), chunk_queue, stop, errors),
+                         name="argonaut-chunk", daemon=True),
+    ]
+    for thread in threads:
+        thread.start()
+
+    try:
+        batch = []
+        consumed = 0
+        for chunk in _drain(chunk_queue, stop):
+            batch.append(chunk)
+            if len(batch) >= batch_size:
+                # Already-indexed chunks (a re-upload) are skipped without embedding
+                stats["chunks_embedded"] += add_chunks(vectorstore, batch, source_name)
+                consumed += len(batch)
+                batch = []
+                if progress:
+                    progress(consumed, expected_chunks())
+        if batch:
+            stats["chunks_embedded"] += add_chunks(vectorstore, batch, source_name)
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+    if errors:
+        raise errors[0]
+
+    stats["dedup"] = deduper.report()
+    stats["wall_seconds"] = time.perf_counter() - started
+    if progress:
+        progress(stats["chunks_produced"], stats["chunks_produced"])
+    return vectorstore, stats
@@ -2,31 +2,174 @@
 # 📁 agent/qa_agent.py
 # -------------------------
 import os
-from langchain.chains import RetrievalQA
-from langchain_core.vectorstores import VectorStore
-from langchain_openai import ChatOpenAI
-from langchain_community.llms import GPT4All
+from functools import partial
 
-def ask_question(vectorstore, question, openai_api_key=None, local_model_path=None):
+# Dense-only retrieval keeps LangChain's default; fused rankings are precise
+# enough to send fewer chunks to the LLM
+RETRIEVAL_K = 4
+HYBRID_K = 3
+
+# Context windows of the answering models, in tokens. GPT4All models are
+# loaded with n_ctx=2048.
+CONTEXT_WINDOWS = {"openai:gpt-3.5-turbo": 16385}
+LOCAL_CONTEXT_WINDOW = 2048
+# Room left for the generated answer
+ANSWER_TOKENS = 256
+# Chunk token counts are cl100k; local models' own tokenizers usually need
+# more tokens for the same text
+LOCAL_TOKEN_SAFETY = 1.25
+# Upper bound even for large windows: more context mostly adds prefill time
+MAX_CONTEXT_TOKENS = 3000
+
+
+def build_retriever(vectorstore, sparse_index=None, k=None):
+    """
+    Dense retriever by default; BM25 + dense fusion when a sparse index is
+    given, and keyword-only when `vectorstore` is None.
+    """
+    from agent.sparse_index import HybridRetriever
+
+    if sparse_index is None:
+        return vectorstore.as_retriever(search_kwargs={"k": k or RETRIEVAL_K})
+    return HybridRetriever(vectorstore=vectorstore, sparse_index=sparse_index, k=k or HYBRID_K)
+
+
+def _load_llm(openai_api_key=None, local_model_path=None):
     if openai_api_key:
-        llm = ChatOpenAI(model_name="gpt-3.5-turbo", temperature=0.3, api_key=openai_api_key)
-    elif local_model_path:
+        from langchain_openai import ChatOpenAI
+        return ChatOpenAI(model_name="gpt-3.5-turbo", temperature=0.3, api_key=openai_api_key)
+    if local_model_path:
         if not os.path.exists(local_model_path):
             raise FileNotFoundError("GPT4All model not found")
+        from agent.llm_client import served_llm
+        return served_llm(local_model_path)
+    raise ValueError("Must provide OpenAI key or local path")
+
+
+def model_id(openai_api_key=None, local_model_path=None):
+    # Identifies the answering model for the semantic answer cache
+    if openai_api_key:
+        return "openai:gpt-3.5-turbo"
+    # The full path: same-named files in different directories are different models
+    return f"gpt4all:{os.path.realpath(local_model_path or '')}"
+
+
+def context_budget(llm, model, question):
+    """
+    Tokens of retrieved context that fit in `model`'s window next to the QA
+    prompt, the question and the answer.
+    """
+    from agent.chunker import count_tokens
+
+    window = CONTEXT_WINDOWS.get(model, LOCAL_CONTEXT_WINDOW)
+    safety = 1.0 if model in CONTEXT_WINDOWS else LOCAL_TOKEN_SAFETY
+    prompt_tokens = count_tokens(_render_prompt(llm, "", question).to_string())
+    budget = int((window - ANSWER_TOKENS) / safety) - prompt_tokens
+    return max(0, min(MAX_CONTEXT_TOKENS, budget))
+
+
+def build_packed_retriever(vectorstore, llm, model, question, sparse_index=None, k=None):
+    """
+    Fetches `PACK_CANDIDATES` chunks, then MMR-deduplicates and packs them
+    into `context_budget`; `k`, if given, also caps the number of chunks.
+    """
+    from agent.context_packing import PACK_CANDIDATES, PackedRetriever
+
+    return PackedRetriever(
+        base=build_retriever(vectorstore, sparse_index, PACK_CANDIDATES),
+        vectorstore=vectorstore,
+        token_budget=context_budget(llm, model, question),
+        max_chunks=k,
+    )
+
+
+def _cached_answer(answer_cache, document_id, question, model, use_cache):
+    if answer_cache is None or document_id is None or not use_cache:
+        return None
+    hit = answer_cache.lookup(document_id, model, question)
+    return hit[0] if hit else None
+
+
+def ask_question(vectorstore, question, openai_api_key=None, local_model_path=None, sparse_index=None, k=None,
+                 answer_cache=None, document_id=None, use_cache=True, report=None, store_answer=True):
+    """
+    Answers `question` from the retrieved chunks of `vectorstore`.
+
+    With an `answer_cache` and a `document_id` (e.g. the PDF digest), a close
+    enough earlier question about the same document and model is answered
+    from the cache. An identical prompt is answered from the response cache.
+    `use_cache=False` bypasses both lookups; the fresh answer still replaces
+    what is cached. Pass `store_answer=False` when retrieval ran against an
+    incomplete index, so a degraded answer is never served to later askers.
+
+    `report`, if given, is filled in with the packed context: candidates,
+    chunks, context_tokens, budget and prompt_tokens (the whole prompt sent).
+    It is left empty for an answer from the answer cache.
+    """
+    from agent.response_cache import cached_invoke
+
+    model = model_id(openai_api_key, local_model_path)
+    cached = _cached_answer(answer_cache, document_id, question, model, use_cache)
+    if cached is not None:
+        return cached
+
+    llm = _load_llm(openai_api_key, local_model_path)
+    retriever = build_packed_retriever(vectorstore, llm, model, question, sparse_index, k)
+    answer = cached_invoke(llm, _qa_prompt(llm, retriever, question, report), use_cache)
+    if store_answer and answer_cache is not None and document_id is not None:
+        answer_cache.store(document_id, model, question, answer)
+    return answer
+
+
+def _render_prompt(llm, context, question):
+    # The prompt and context layout of LangChain's "stuff" RetrievalQA chain
+    from langchain.chains.question_answering.stuff_prompt import PROMPT_SELECTOR
+
+    return PROMPT_SELECTOR.get_prompt(llm).invoke({"context": context, "question": question})
+
+
+def _qa_prompt(llm, retriever, question, report=None):
+    from agent.chunker import count_tokens
+
+    docs = retriever.invoke(question)
+    prompt = _render_prompt(llm, "\n\n".join(doc.page_content for doc in docs), question)
+    if report is not None:
+        report.update(retriever.last_report or {})
+        report["prompt_tokens"] = count_tokens(prompt.to_string())
+    return prompt
+
+
+def _answer_tokens(llm, retriever, question, use_cache=True, on_answer=None, report=None):
+    from agent.response_cache import cached_stream
+
+    parts = []
+    for token in cached_stream(llm, _qa_prompt(llm, retriever, question, report), use_cache):
+        parts.append(token)
+        yield token
+    if on_answer:
+        on_answer("".join(parts))
+
 
-        # 🧠 Auto-detect backend
-        model_name = os.path.basename(local_model_path).lower()
-        if ".gguf" in model_name or "mistral" in model_name:
-            backend = "llama"
-        elif "gpt4all-j" in model_name:
-            backend = "gptj"
-        else:
-            backend = "auto"
+def stream_answer(vectorstore, question, openai_api_key=None, local_model_path=None, sparse_index=None, k=None,
+                  answer_cache=None, document_id=None, use_cache=True, report=None, store_answer=True):
+    """
+    Streaming `ask_question`: returns a `TimedStream` of answer tokens, with
+    `from_cache` set when the answer came from `answer_cache`. `report` is
+    filled in once the stream starts.
+    """
+    from agent.streaming import TimedStream
 
-        llm = GPT4All(model=local_model_path, backend=backend, verbose=False)
+    model = model_id(openai_api_key, local_model_path)
+    cached = _cached_answer(answer_cache, document_id, question, model, use_cache)
+    if cached is not None:
+        stream = TimedStream([cached], "qa (cached)")
+        stream.from_cache = True
+        return stream
 
-    else:
-        raise ValueError("Must provide OpenAI key or local path")
+    on_answer = None
+    if store_answer and answer_cache is not None and document_id is not None:
+        on_answer = partial(answer_cache.store, document_id, model, question)
 
-    qa = RetrievalQA.from_chain_type(llm=llm, chain_type="stuff", retriever=vectorstore.as_retriever())
-    return qa.run(question)
\ No newline at end of file
+    llm = _load_llm(openai_api_key, local_model_path)
+    retriever = build_packed_retriever(vectorstore, llm, model, question, sparse_index, k)
+    return TimedStream(_answer_tokens(llm, retriever, question, use_cache, on_answer, report), "qa")
\ No newline at end of file
@@ -0,0 +1,141 @@
+# ----------------------------
+# 📁 agent/response_cache.py
+# ----------------------------
+import hashlib
+import sqlite3
+import threading
+import time
+
+RESPONSE_CACHE_PATH = "response_cache.sqlite"
+RESPONSE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+_response_cache = None
+
+
+class ResponseCache:
+    """
+    SQLite-backed exact-match cache of LLM responses, keyed by
+    `response_key` (model identity, sampling params and rendered prompt).
+
+    Once the stored responses exceed `max_bytes`, the least recently used
+    are evicted down to 90% of it.
+    """
+
+    def __init__(self, path=RESPONSE_CACHE_PATH, max_bytes=RESPONSE_CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, response TEXT NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+        self._conn.commit()
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+        return row[0]
+
+    def put(self, key, response):
+        size = len(response.encode("utf-8"))
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                               (key, response, size, time.time()))
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        (total,) = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if total <= self.max_bytes:
+            return
+        excess = total - int(self.max_bytes * 0.9)
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY last_used").fetchall():
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            excess -= size
+            if excess <= 0:
+                break
+
+    def stats(self):
+        with self._lock:
+            entries, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "bytes": total,
+        }
+
+
+def set_response_cache(cache):
+    """
+    Sets the process-wide cache every agent reads and writes; None disables it.
+    """
+    global _response_cache
+    _response_cache = cache
+
+
+def _prompt_text(prompt):
+    # Prompt values (chat or string) render the same way for every call
+    return prompt.to_string() if hasattr(prompt, "to_string") else str(prompt)
+
+
+def _text(response):
+    return response.content if hasattr(response, "content") else str(response)
+
+
+def response_key(llm, prompt):
+    # _identifying_params holds the model name and its sampling params (temperature, top_p, ...)
+    identity = f"{type(llm).__name__}:{sorted(llm._identifying_params.items())!r}"
+    return hashlib.sha256(f"{identity}\x00{_prompt_text(prompt)}".encode("utf-8")).hexdigest()
+
+
+def cached_invoke(llm, prompt, use_cache=True):
+    """
+    `llm.invoke(prompt)` as text, through the response cache.
+
+    `use_cache=False` skips the lookup, for a fresh sample when the model
+    runs at temperature > 0; the new response replaces the cached one.
+    """
+    cache = _response_cache
+    key = response_key(llm, prompt) if cache is not None else None
+    if key and use_cache:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+    text = _text(llm.invoke(prompt))
+    if key:
+        cache.put(key, text)
+    return text
+
+
+def cached_stream(llm, prompt, use_cache=True):
+    """
+    Streaming `cached_invoke`: a hit is yielded as one piece, and a streamed
+    response is cached once it has completed.
+    """
+    cache = _response_cache
+    key = response_key(llm, prompt) if cache is not None else None
+    if key and use_cache:
+        cached = cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+    parts = []
+    for chunk in llm.stream(prompt):
+        parts.append(_text(chunk))
+        yield parts[-1]
+    if key:
+        cache.put(key, "".join(parts))
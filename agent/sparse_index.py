@@ -0,0 +1,133 @@
+# -------------------------
+# 📁 agent/sparse_index.py
+# -------------------------
+import heapq
+import math
+import re
+import threading
+from collections import Counter
+from typing import Any, Optional
+
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from pydantic import ConfigDict
+
+from agent.embedding_cache import chunk_hash
+
+# Keeps identifiers like "BRCA1", "ImageNet-1k" or "eq. 3.2" as single terms
+_TERM_RE = re.compile(r"[a-z0-9]+(?:[-_.][a-z0-9]+)*")
+_STOPWORDS = frozenset(
+    "a an and are as at be by do does for from has have how in is it its of on or that the their "
+    "they this to was were what when where which who why with".split()
+)
+
+RRF_K = 60
+
+
+def tokenize(text):
+    terms = []
+    for term in _TERM_RE.findall(text.lower()):
+        if term in _STOPWORDS:
+            continue
+        terms.append(term)
+        # "imagenet-1k" should also match a plain "ImageNet"
+        if not term.isalnum():
+            terms.extend(part for part in re.split(r"[-_.]", term) if part not in _STOPWORDS)
+    return terms
+
+
+class BM25Index:
+    """
+    Inverted index with Okapi BM25 scoring, built next to the vectors at
+    ingest time. Adding a chunk ID twice is a no-op.
+    """
+
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings = {}  # term -> {row: term frequency}
+        self._lengths = []
+        self._texts = []
+        self._metadatas = []
+        self._ids = []
+        self._id_index = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._ids)
+
+    def add(self, texts, metadatas=None, ids=None):
+        texts = list(texts)
+        metadatas = list(metadatas) if metadatas is not None else [{} for _ in texts]
+        ids = list(ids) if ids is not None else [chunk_hash(text) for text in texts]
+        with self._lock:
+            for text, metadata, chunk_id in zip(texts, metadatas, ids):
+                if chunk_id in self._id_index:
+                    continue
+                row = len(self._ids)
+                self._id_index[chunk_id] = row
+                self._ids.append(chunk_id)
+                self._texts.append(text)
+                self._metadatas.append(metadata)
+                terms = Counter(tokenize(text))
+                self._lengths.append(sum(terms.values()))
+                for term, count in terms.items():
+                    self._postings.setdefault(term, {})[row] = count
+
+    def search(self, query, k=4):
+        """
+        Returns:
+            Up to k (Document, score) tuples, best first
+        """
+        with self._lock:
+            n = len(self._ids)
+            if not n:
+                return []
+            average_length = sum(self._lengths) / n
+            scores = {}
+            for term in set(tokenize(query)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+                for row, tf in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._lengths[row] / average_length)
+                    scores[row] = scores.get(row, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+            top = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+            return [
+                (Document(page_content=self._texts[row], metadata=self._metadatas[row], id=self._ids[row]), score)
+                for row, score in top
+            ]
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    Fuses dense (vector store) and sparse (BM25) rankings with reciprocal
+    rank fusion. Either side may be None: with only a `sparse_index` it is a
+    keyword-only fast path that needs no embedding model.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    vectorstore: Optional[Any] = None
+    sparse_index: Optional[BM25Index] = None
+    k: int = 3
+    fetch_k: int = 20
+    rrf_k: int = RRF_K
+
+    def _get_relevant_documents(self, query, *, run_manager=None):
+        rankings = []
+        if self.vectorstore is not None:
+            rankings.append(self.vectorstore.similarity_search(query, k=self.fetch_k))
+        if self.sparse_index is not None:
+            rankings.append([doc for doc, _ in self.sparse_index.search(query, self.fetch_k)])
+
+        fused = {}
+        documents = {}
+        for ranking in rankings:
+            for rank, doc in enumerate(ranking):
+                key = chunk_hash(doc.page_content)
+                documents.setdefault(key, doc)
+                fused[key] = fused.get(key, 0.0) + 1.0 / (self.rrf_k + rank + 1)
+        best = heapq.nlargest(self.k, fused.items(), key=lambda item: item[1])
+        return [documents[key] for key, _ in best]
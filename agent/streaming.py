@@ -0,0 +1,70 @@
+# -------------------------
+# 📁 agent/streaming.py
+# -------------------------
+import threading
+import time
+from collections import deque
+
+TTFT_WINDOW = 100
+
+_records = deque(maxlen=TTFT_WINDOW)  # (name, time to first token, total seconds)
+_lock = threading.Lock()
+
+
+class TimedStream:
+    """
+    Iterator over a token stream that records, for `name`, the time from
+    creation to the first token and to the end of the stream.
+
+    `ttft`, `total` and `text` are filled in as the stream is consumed;
+    `stream_stats` summarises the recent calls.
+    """
+
+    def __init__(self, tokens, name):
+        self.name = name
+        self.from_cache = False
+        self.ttft = None
+        self.total = None
+        self._tokens = iter(tokens)
+        self._parts = []
+        self._start = time.perf_counter()
+
+    @property
+    def text(self):
+        return "".join(self._parts)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            token = next(self._tokens)
+        except StopIteration:
+            if self.total is None:
+                self.total = time.perf_counter() - self._start
+                with _lock:
+                    _records.append((self.name, self.ttft, self.total))
+            raise
+        if self.ttft is None:
+            self.ttft = time.perf_counter() - self._start
+        self._parts.append(token)
+        return token
+
+
+def stream_stats():
+    """
+    Returns:
+        {name: {"calls", "mean_ttft", "mean_total"}} over the last TTFT_WINDOW streams
+    """
+    with _lock:
+        records = list(_records)
+    stats = {}
+    for name in {name for name, _, _ in records}:
+        ttfts = [ttft for n, ttft, _ in records if n == name and ttft is not None]
+        totals = [total for n, _, total in records if n == name]
+        stats[name] = {
+            "calls": len(totals),
+            "mean_ttft": sum(ttfts) / len(ttfts) if ttfts else None,
+            "mean_total": sum(totals) / len(totals),
+        }
+    return stats
@@ -4,10 +4,8 @@
 
 import os
 import uuid
-import networkx as nx
-from pyvis.network import Network
-from keybert import KeyBERT
-from sentence_transformers import SentenceTransformer, util
+
+from agent.model_registry import get_keybert, get_sentence_model
 
 
 def extract_concepts(text, top_k=20):
@@ -17,7 +15,7 @@ def extract_concepts(text, top_k=20):
     Returns:
         List of (keyphrase, score) tuples
     """
-    kw_model = KeyBERT()
+    kw_model = get_keybert()
     keywords = kw_model.extract_keywords(
         text,
         keyphrase_ngram_range=(1, 3),
@@ -34,10 +32,13 @@ def build_concept_graph(keywords, similarity_threshold=0.5):
     Returns:
         A networkx graph with nodes and weighted edges.
     """
+    import networkx as nx
+    from sentence_transformers import util
+
     phrases = [kw[0] for kw in keywords]
     weights = [kw[1] for kw in keywords]
 
-    model = SentenceTransformer("all-MiniLM-L6-v2")
+    model = get_sentence_model("all-MiniLM-L6-v2")
     embeddings = model.encode(phrases, convert_to_tensor=True)
     similarity_matrix = util.pytorch_cos_sim(embeddings, embeddings)
 
@@ -62,6 +63,8 @@ def render_graph(graph, output_dir="static/concept_maps"):
     Returns:
         Path to saved HTML file.
     """
+    from pyvis.network import Network
+
     os.makedirs(output_dir, exist_ok=True)
     net = Network(height="650px", width="100%", bgcolor="#222222", font_color="white")
     net.from_nx(graph)
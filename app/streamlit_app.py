@@ -6,15 +6,19 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 import streamlit as st
 from streamlit.components.v1 import html
 from dotenv import load_dotenv
-from agent.pdf_parser import parse_pdf
-from agent.embedder import embed_text_chunks
-from agent.qa_agent import ask_question
-from agent.visualizer import extract_concepts, build_concept_graph, render_graph
-from agent.hypothesis import suggest_hypotheses
+# Only what the first paint needs is imported here. Feature modules (torch,
+# langchain, chromadb, gpt4all, ...) are imported by the branch that uses
+# them, so the sidebar renders before any of them load. Check the budget
+# with `python benchmarks/bench_import_time.py`.
+from agent.answer_cache import SemanticAnswerCache
+from agent.parse_cache import ParseCache
+from agent.response_cache import ResponseCache, set_response_cache
+from agent.embedding_cache import EmbeddingCache, chunk_hash
+from agent.embedder import VECTOR_STORES
+from agent.model_registry import EMBEDDING_BACKENDS
 from agent.memory import save_to_memory, display_memory
-from agent.arxiv_fetcher import fetch_arxiv_papers
-from agent.critique_agents import run_critique_agent
-from fpdf import FPDF
+from agent.llm_server import llm_server_stats
+from agent.streaming import stream_stats
 
 # ===============
 # 🌍 ENV & CONFIG
@@ -23,6 +27,53 @@ load_dotenv()
 os.makedirs("models", exist_ok=True)
 st.set_page_config(page_title="Argonaut Research Agent", layout="wide")
 
+
+@st.cache_resource
+def get_parse_cache():
+    # One cache (and one set of hit/miss counters) shared by every session
+    return ParseCache()
+
+
+@st.cache_resource
+def get_embedding_cache():
+    return EmbeddingCache()
+
+
+@st.cache_resource
+def get_answer_cache():
+    # Shared by every session, so a popular paper's common questions are answered once
+    from agent.embedder import SharedModelEmbeddings
+    return SemanticAnswerCache(SharedModelEmbeddings(cache=get_embedding_cache()))
+
+
+@st.cache_resource
+def get_response_cache():
+    return ResponseCache()
+
+
+parse_cache = get_parse_cache()
+embedding_cache = get_embedding_cache()
+answer_cache = get_answer_cache()
+response_cache = get_response_cache()
+# Every agent reads and writes this one
+set_response_cache(response_cache)
+
+
+def show_stream(tokens, report=None):
+    """
+    Renders a `TimedStream` as it arrives and returns the full text.
+    `report` is the context report filled in by `stream_answer`.
+    """
+    text = st.write_stream(tokens)
+    if tokens.from_cache:
+        st.caption("♻️ Answered from the cache of similar questions about this document.")
+    elif tokens.ttft is not None:
+        st.caption(f"⏱️ First token after {tokens.ttft:.1f}s, done in {tokens.total:.1f}s")
+    if report:
+        st.caption(f"📦 Sent {report['prompt_tokens']} tokens: {report['chunks']} of {report['candidates']} "
+                   f"chunks, {report['context_tokens']}/{report['budget']} context tokens")
+    return text
+
 # =====================
 # 🌗 TOP-RIGHT THEME TOGGLE
 # =====================
@@ -133,6 +184,43 @@ with st.sidebar:
             st.stop()
 
     option = st.selectbox("📘 Mode", ["Upload PDF", "Search ArXiv"])
+    embedding_backend = st.selectbox("⚡ Embedding Backend", EMBEDDING_BACKENDS,
+                                     help="onnx-int8 is the fastest on CPU-only machines")
+    vector_store = st.selectbox("🗄️ Vector Store", VECTOR_STORES,
+                                help="memory is fastest for one paper or a few abstracts; chroma persists")
+
+    cache_stats = parse_cache.stats()
+    st.caption(
+        f"📦 Parse cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+        f"({cache_stats['entries']} papers, {cache_stats['bytes'] / 1e6:.1f} MB)"
+    )
+    embed_stats = embedding_cache.stats()
+    st.caption(
+        f"🧮 Embedding cache: {embed_stats['hit_rate']:.0%} hit rate "
+        f"({embed_stats['entries']:,} vectors)"
+    )
+    llm_stats = llm_server_stats()
+    if mode == "GPT4All (offline)" and llm_stats:
+        models = llm_stats["models"]
+        st.caption(
+            f"🧠 Local model server: {llm_stats['queue_depth']} queued"
+            f"{' + 1 running' if llm_stats['running'] else ''}, "
+            f"wait {llm_stats['mean_wait']:.1f}s avg / {llm_stats['max_wait']:.1f}s max, "
+            f"{models.get('loaded', 0)} model(s) resident ({models.get('bytes', 0) / 1e9:.1f} GB)"
+        )
+    reuse_responses = st.checkbox("♻️ Reuse cached responses", value=True,
+                                   help="Untick for a fresh sample from the model, e.g. new hypotheses; "
+                                        "the fresh response is still cached")
+    answer_stats = answer_cache.stats()
+    response_stats = response_cache.stats()
+    st.caption(
+        f"💬 Answer cache: {answer_stats['hit_rate']:.0%} hit rate ({answer_stats['entries']:,} answers); "
+        f"response cache: {response_stats['hit_rate']:.0%} hit rate ({response_stats['entries']:,} responses, "
+        f"{response_stats['bytes'] / 1e6:.1f} MB)"
+    )
+    ttfts = [f"{name} {s['mean_ttft']:.1f}s" for name, s in sorted(stream_stats().items()) if s["mean_ttft"]]
+    if ttfts:
+        st.caption("⏱️ Mean time to first token: " + ", ".join(ttfts))
 
 # =====================
 # 📌 MAIN LAYOUT (Centered)
@@ -204,43 +292,109 @@ if not openai_api_key and mode == "OpenAI (cloud)":
 # ========================
 if option == "Upload PDF":
     uploaded_file = st.file_uploader("Upload a PDF", type=["pdf"], key="pdf_uploader")
+    drop_references = st.checkbox("✂️ Drop references section", value=True, key="pdf_drop_refs")
 
     if uploaded_file:
-        if not st.session_state.pdf_text:
-            text = parse_pdf(uploaded_file)
-            st.session_state.pdf_text = text
-            st.session_state.pdf_chunks = text.split("\n")
-            st.session_state.vectorstore_pdf = embed_text_chunks(
-                st.session_state.pdf_chunks, source_name=uploaded_file.name)
+        from agent.critique_agents import stream_critique
+        from agent.hypothesis import stream_hypotheses
+        from agent.indexing import start_pdf_indexing
+        from agent.qa_agent import stream_answer
+        from agent.visualizer import extract_concepts, build_concept_graph, render_graph
+
+        # Changing any indexing setting re-indexes the same upload
+        upload_id = (getattr(uploaded_file, "file_id", uploaded_file.name), drop_references, embedding_backend,
+                     vector_store)
+        job = st.session_state.get("pdf_job")
+        if job is None or st.session_state.get("pdf_job_id") != upload_id:
+            job = start_pdf_indexing(
+                uploaded_file, uploaded_file.name, parse_cache=parse_cache, embedding_cache=embedding_cache,
+                drop_references=drop_references, backend=embedding_backend, store=vector_store,
+            )
+            st.session_state.pdf_job = job
+            st.session_state.pdf_job_id = upload_id
+
+        with st.spinner("📄 Extracting text..."):
+            try:
+                st.session_state.pdf_text = job.wait_text()
+            except Exception as e:
+                st.error(f"❌ Could not parse PDF: {e}")
+                st.stop()
 
         st.success("✅ PDF uploaded and parsed.")
+        report = job.cleaning_report
+        if report:
+            st.caption(
+                f"🧹 Cleaning removed {report['chars_removed']:,} characters and "
+                f"{report['chunks_removed']:,} chunks ({report['repeated_lines']} running headers/footers)."
+            )
+        dedup = job.dedup_report
+        if dedup and dedup["chunks_removed"]:
+            st.caption(
+                f"♻️ Skipped {dedup['chunks_removed']:,} of {dedup['chunks_in']:,} near-duplicate chunks "
+                f"({dedup['chars_removed']:,} characters)."
+            )
         st.text_area("📜 Extracted Text Preview", st.session_state.pdf_text[:2000], height=300)
 
+        @st.fragment(run_every=1)
+        def indexing_status():
+            if job.ready or job.failed:
+                # A full rerun lets the rest of the page see the finished index
+                st.rerun()
+            st.progress(job.progress, text=f"🧮 Embedding chunks... {job.progress:.0%}")
+
+        if job.failed:
+            st.error(f"❌ Indexing failed: {job.error}")
+        elif not job.ready:
+            indexing_status()
+
         question = st.text_input("Enter a question about the paper", key="pdf_q")
         if st.button("Ask", key="pdf_ask") and question:
-            answer = ask_question(
+            # Until the embeddings are done, answer from the keyword index alone,
+            # which is complete shortly after the text is
+            full_index = job.ready
+            st.session_state.vectorstore_pdf = job.vectorstore if full_index else None
+            if not full_index:
+                with st.spinner("🔎 Finishing the keyword index..."):
+                    try:
+                        job.wait_keywords()
+                    except Exception as e:
+                        st.error(f"❌ Indexing failed: {e}")
+                        st.stop()
+                st.caption("⚡ Embeddings are still building, so this answer uses keyword search only.")
+            context_report = {}
+            tokens = stream_answer(
                 st.session_state.vectorstore_pdf,
                 question,
                 openai_api_key=openai_api_key if mode == "OpenAI (cloud)" else None,
-                local_model_path=local_model_path
+                local_model_path=local_model_path,
+                sparse_index=job.sparse_index,
+                answer_cache=answer_cache,
+                document_id=job.document_id,
+                use_cache=reuse_responses,
+                report=context_report,
+                # Keyword-only answers are not shared through the cache
+                store_answer=full_index,
             )
+            st.success("💬 Answer:")
+            answer = show_stream(tokens, context_report)
             st.session_state.last_pdf_answer = answer
             save_to_memory(question, answer, context=uploaded_file.name)
 
-        if st.session_state.last_pdf_answer:
+        elif st.session_state.last_pdf_answer:
             st.success("💬 Answer:")
             st.write(st.session_state.last_pdf_answer)
 
         if st.button("Suggest Hypotheses", key="pdf_hypo"):
-            ideas = suggest_hypotheses(
+            ideas = show_stream(stream_hypotheses(
                 st.session_state.pdf_text,
                 api_key=openai_api_key if mode == "OpenAI (cloud)" else None,
-                local_model_path=local_model_path
-            )
+                local_model_path=local_model_path,
+                use_cache=reuse_responses,
+            ))
             st.session_state.hypotheses_pdf = ideas
             save_to_memory("Hypotheses", ideas, context=uploaded_file.name)
 
-        if st.session_state.hypotheses_pdf:
+        elif st.session_state.hypotheses_pdf:
             st.markdown(st.session_state.hypotheses_pdf)
 
         import streamlit.components.v1 as components
@@ -258,15 +412,17 @@ if option == "Upload PDF":
 
         persona = st.selectbox("Choose Persona", ["Researcher", "Reviewer", "Explainer"], key="pdf_persona")
         if st.button("Run Critique", key="pdf_critique"):
-            critique = run_critique_agent(
+            st.markdown(f"**🧠 {persona} says:**")
+            critique = show_stream(stream_critique(
                 persona,
                 st.session_state.pdf_text[:3000],
                 openai_api_key=openai_api_key if mode == "OpenAI (cloud)" else None,
-                local_model_path=local_model_path
-            )
+                local_model_path=local_model_path,
+                use_cache=reuse_responses,
+            ))
             st.session_state.critique_pdf = critique
 
-        if st.session_state.critique_pdf:
+        elif st.session_state.critique_pdf:
             st.markdown(f"**🧠 {persona} says:**")
             st.write(st.session_state.critique_pdf)
 
@@ -279,6 +435,8 @@ if option == "Upload PDF":
                 st.markdown(f"_📎 Context: {item['context']}_")
 
         if st.button("📄 Export Q&A to PDF"):
+            from fpdf import FPDF
+
             pdf = FPDF()
             pdf.add_page()
             pdf.set_font("Arial", size=12)
@@ -298,6 +456,14 @@ if option == "Upload PDF":
 # 🌐 Search ArXiv Mode
 # ========================
 elif option == "Search ArXiv":
+    from agent.arxiv_fetcher import fetch_arxiv_papers
+    from agent.chunker import chunk_text
+    from agent.dedup import dedupe_chunks
+    from agent.embedder import collection_name_for, embed_text_chunks
+    from agent.hypothesis import stream_hypotheses
+    from agent.qa_agent import stream_answer
+    from agent.sparse_index import BM25Index
+
     arxiv_query = st.text_input("🔍 Enter arXiv query", "transformers for biology")
     num_results = st.slider("🔐 Number of papers", 1, 10, 3)
 
@@ -315,33 +481,50 @@ elif option == "Search ArXiv":
                 st.markdown(f"**Authors:** {', '.join(paper['authors'])}")
                 st.markdown(f"🔗 [PDF]({paper.get('pdf_url', paper.get('url', '#'))})")
                 st.markdown(f"🧠 {paper['summary'][:800]}...")
-                st.session_state.arxiv_chunks.extend(paper['summary'].split("\n"))
-
+                st.session_state.arxiv_chunks.extend(chunk_text(paper['summary']))
+
+            unique_chunks, dedup = dedupe_chunks(st.session_state.arxiv_chunks)
+            if dedup["chunks_removed"]:
+                st.caption(f"♻️ Skipped {dedup['chunks_removed']} near-duplicate chunks.")
+            st.session_state.sparse_arxiv = BM25Index()
+            # The same search results are the same "document" for the answer cache
+            st.session_state.arxiv_document_id = collection_name_for(
+                "arxiv_search", [chunk_hash(chunk) for chunk in unique_chunks])
             st.session_state.vectorstore_arxiv = embed_text_chunks(
-                st.session_state.arxiv_chunks, source_name="arxiv_search")
+                unique_chunks, source_name="arxiv_search", embedding_cache=embedding_cache,
+                backend=embedding_backend, store=vector_store, sparse_index=st.session_state.sparse_arxiv)
 
     st.subheader("🤖 Ask a Question about These Papers")
     arxiv_question = st.text_input("Ask your question here (arXiv)", key="arxiv_q")
     if st.button("Ask ArXiv") and st.session_state.vectorstore_arxiv:
-        st.session_state.arxiv_answer = ask_question(
+        context_report = {}
+        tokens = stream_answer(
             st.session_state.vectorstore_arxiv,
             st.session_state.arxiv_q,
             openai_api_key if mode == "OpenAI (cloud)" else None,
-            local_model_path=local_model_path
+            local_model_path=local_model_path,
+            sparse_index=st.session_state.get("sparse_arxiv"),
+            answer_cache=answer_cache,
+            document_id=st.session_state.get("arxiv_document_id"),
+            use_cache=reuse_responses,
+            report=context_report,
         )
+        st.success("💬 Answer:")
+        st.session_state.arxiv_answer = show_stream(tokens, context_report)
 
-    if st.session_state.arxiv_answer:
+    elif st.session_state.arxiv_answer:
         st.success("💬 Answer:")
         st.write(st.session_state.arxiv_answer)
 
     st.subheader("🧪 Suggest Hypotheses (arXiv)")
     if st.button("Suggest Hypotheses from ArXiv") and st.session_state.arxiv_chunks:
         combined_text = "\n".join(st.session_state.arxiv_chunks)
-        st.session_state.arxiv_hypotheses = suggest_hypotheses(
+        st.session_state.arxiv_hypotheses = show_stream(stream_hypotheses(
             combined_text,
             api_key=openai_api_key if mode == "OpenAI (cloud)" else None,
-            local_model_path=local_model_path
-        )
+            local_model_path=local_model_path,
+            use_cache=reuse_responses,
+        ))
 
-    if st.session_state.arxiv_hypotheses:
+    elif st.session_state.arxiv_hypotheses:
         st.markdown(st.session_state.arxiv_hypotheses)
\ No newline at end of file
@@ -0,0 +1,53 @@
+# ------------------------------
+# 📁 benchmarks/bench_chunking.py
+# ------------------------------
+# Compares line splitting with the token-aware chunker: chunk count and the
+# time it takes to embed the chunks with the default sentence-transformer.
+#
+#   python benchmarks/bench_chunking.py paper.pdf
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sentence_transformers import SentenceTransformer
+from agent.chunker import chunk_pages, count_tokens
+from agent.pdf_parser import iter_pdf_pages
+
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+
+
+def line_chunks(pages):
+    return [line for _, text in pages for line in text.split("\n")]
+
+
+def report(label, chunks, model):
+    tokens = [count_tokens(chunk) for chunk in chunks]
+    start = time.perf_counter()
+    model.encode(chunks, batch_size=32)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<10} chunks={len(chunks):<6} median_tokens={statistics.median(tokens):<6.0f} "
+          f"embed={elapsed:.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("pdf")
+    parser.add_argument("--max-tokens", type=int, default=200)
+    parser.add_argument("--overlap", type=int, default=40)
+    args = parser.parse_args()
+
+    with open(args.pdf, "rb") as f:
+        pages = list(iter_pdf_pages(f))
+    model = SentenceTransformer(MODEL_NAME)
+    model.encode(["warm up"])
+
+    report("lines", line_chunks(pages), model)
+    report("chunker", list(chunk_pages(pages, args.max_tokens, args.overlap)), model)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# ---------------------------------------
+# 📁 benchmarks/bench_embedding_batching.py
+# ---------------------------------------
+# Chunks/sec on CPU for document-order encoding versus length-bucketed
+# batches, across batch sizes. Uses a PDF if given, else synthetic chunks
+# with a realistic spread of lengths.
+#
+#   python benchmarks/bench_embedding_batching.py [paper.pdf]
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import torch
+from agent.embedder import SharedModelEmbeddings
+from agent.model_registry import get_sentence_model
+
+WORDS = "protein folding attention layer dataset gene expression embedding transformer cell".split()
+
+
+def synthetic_chunks(n, seed=0):
+    rng = random.Random(seed)
+    # Mostly short fragments with a long tail, like captions mixed with body text
+    return [" ".join(rng.choices(WORDS, k=int(rng.paretovariate(1.2) * 8))) for _ in range(n)]
+
+
+def pdf_chunks(path):
+    from agent.chunker import chunk_pages
+    from agent.pdf_parser import iter_pdf_pages
+
+    with open(path, "rb") as f:
+        return list(chunk_pages(iter_pdf_pages(f)))
+
+
+def run(embedder, chunks, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        embedder.embed_documents(chunks)
+        best = min(best, time.perf_counter() - start)
+    return len(chunks) / best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("pdf", nargs="?")
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[16, 32, 64, 128])
+    parser.add_argument("--repeat", type=int, default=2)
+    args = parser.parse_args()
+
+    chunks = pdf_chunks(args.pdf) if args.pdf else synthetic_chunks(args.chunks)
+    get_sentence_model().encode(["warm up"])
+    print(f"{len(chunks)} chunks, torch threads={torch.get_num_threads()}")
+
+    for batch_size in args.batch_sizes:
+        plain = run(SharedModelEmbeddings(batch_size=batch_size, bucket_by_length=False), chunks, args.repeat)
+        bucketed = run(SharedModelEmbeddings(batch_size=batch_size, bucket_by_length=True), chunks, args.repeat)
+        print(f"batch_size={batch_size:<4} document-order={plain:8.1f} chunks/s "
+              f"bucketed={bucketed:8.1f} chunks/s ({bucketed / plain:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+# ------------------------------------
+# 📁 benchmarks/bench_embedding_pool.py
+# ------------------------------------
+# Bulk ingestion throughput: one process on all torch threads versus an
+# EmbeddingPool with 1..N single-threaded workers. Model loading is excluded
+# (the pool warms up before timing), so the numbers show encoding scaling.
+#
+#   python benchmarks/bench_embedding_pool.py --chunks 4000
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import torch
+from agent.embedder import embed_text_chunks
+from agent.embedding_pool import EmbeddingPool, physical_cores
+from agent.model_registry import get_sentence_model
+from bench_embedding_batching import synthetic_chunks
+
+
+def ingest(chunks, pool=None):
+    start = time.perf_counter()
+    embed_text_chunks(chunks, "bench.pdf", store="memory", pool=pool)
+    return len(chunks) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=4000)
+    parser.add_argument("--workers", type=int, nargs="+", default=None)
+    parser.add_argument("--threads-per-worker", type=int, default=1)
+    args = parser.parse_args()
+
+    cores = physical_cores()
+    workers = args.workers or sorted({1, 2, max(1, cores // 2), cores})
+    # Distinct chunks per run, so the content-hash IDs never hit an earlier run
+    runs = iter(range(1000))
+
+    get_sentence_model().encode(["warm up"])
+    baseline = ingest(synthetic_chunks(args.chunks, seed=next(runs)))
+    print(f"{cores} physical cores")
+    print(f"in-process ({torch.get_num_threads()} threads) {baseline:8.1f} chunks/s")
+
+    for n in workers:
+        with EmbeddingPool(workers=n, threads_per_worker=args.threads_per_worker) as pool:
+            # Workers spawn and load the model on first submit; keep that out of the timing
+            list(pool.map_batches(["warm up"] * n, task_size=1))
+            rate = ingest(synthetic_chunks(args.chunks, seed=next(runs)), pool)
+        print(f"pool {n:>2} x {args.threads_per_worker} threads     {rate:8.1f} chunks/s "
+              f"({rate / baseline:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# ---------------------------------------
+# 📁 benchmarks/bench_import_time.py
+# ---------------------------------------
+# Cold-start import budget of the Streamlit entry point. Runs the
+# module-level imports of app/streamlit_app.py in a fresh interpreter under
+# `python -X importtime`, then prints the total and the top-level packages
+# that cost the most. Exits non-zero when the total exceeds --budget, so it
+# can guard against a heavy import creeping back to the top of the app.
+#
+#   python benchmarks/bench_import_time.py [--budget 1.5] [--module agent.qa_agent]
+import argparse
+import ast
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+APP = os.path.join(ROOT, "app", "streamlit_app.py")
+STARTUP_BUDGET_S = 1.5
+
+
+def startup_imports(path=APP):
+    """
+    Source of the module-level import statements of `path`; imports nested
+    in branches or functions run later and are not part of the cold start.
+    """
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    return "\n".join(ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom)))
+
+
+def import_times(code):
+    """
+    Returns:
+        {module: (self_us, cumulative_us)} from `-X importtime`
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, env={**os.environ, "PYTHONPATH": ROOT}, capture_output=True, text=True,
+    )
+    if result.returncode:
+        sys.exit(result.stderr.strip().splitlines()[-1])
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--module", help="report `import MODULE` instead of the app's startup imports")
+    parser.add_argument("--budget", type=float, default=STARTUP_BUDGET_S, help="seconds")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    code = f"import {args.module}" if args.module else startup_imports()
+    times = import_times(code)
+    total = sum(self_us for self_us, _ in times.values()) / 1e6
+
+    per_package = defaultdict(int)
+    for name, (self_us, _) in times.items():
+        per_package[name.split(".")[0]] += self_us
+    print(f"{'package':<32}{'self ms':>10}")
+    for package, self_us in sorted(per_package.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{package:<32}{self_us / 1e3:>10.1f}")
+
+    print(f"\n{len(times)} modules, {total:.2f}s total, budget {args.budget:.2f}s")
+    if total > args.budget:
+        sys.exit(f"❌ Over the startup budget by {total - args.budget:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
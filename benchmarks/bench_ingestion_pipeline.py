@@ -0,0 +1,64 @@
+# ---------------------------------------
+# 📁 benchmarks/bench_ingestion_pipeline.py
+# ---------------------------------------
+# End-to-end wall time of sequential ingestion (parse, then clean, then chunk,
+# then embed) against the pipelined ingester, on a real or synthetic PDF.
+# Each run writes to a fresh vector store with no caches.
+#
+#   python benchmarks/bench_ingestion_pipeline.py [paper.pdf] --pages 300
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from agent.chunker import chunk_pages
+from agent.dedup import dedupe_chunks
+from agent.embedder import embed_text_chunks
+from agent.model_registry import get_sentence_model
+from agent.pdf_parser import clean_pages, iter_pdf_pages
+from agent.pipeline import ingest_pdf_pipelined
+from bench_pdf_extraction import make_synthetic_pdf
+
+
+def sequential(data, persist_dir):
+    pages = list(iter_pdf_pages(io.BytesIO(data)))
+    pages, _ = clean_pages(pages)
+    chunks, _ = dedupe_chunks(chunk_pages(pages))
+    embed_text_chunks(chunks, "bench.pdf", persist_dir=persist_dir)
+    return len(chunks)
+
+
+def pipelined(data, persist_dir):
+    _, stats = ingest_pdf_pipelined(io.BytesIO(data), "bench.pdf", persist_dir=persist_dir)
+    return stats["chunks_produced"]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("pdf", nargs="?")
+    parser.add_argument("--pages", type=int, default=300)
+    args = parser.parse_args()
+
+    if args.pdf:
+        with open(args.pdf, "rb") as f:
+            data = f.read()
+    else:
+        data = make_synthetic_pdf(args.pages)
+    get_sentence_model().encode(["warm up"])
+
+    results = {}
+    for label, ingest in (("sequential", sequential), ("pipelined", pipelined)):
+        with tempfile.TemporaryDirectory() as persist_dir:
+            start = time.perf_counter()
+            chunks = ingest(data, persist_dir)
+            results[label] = time.perf_counter() - start
+        print(f"{label:<10} chunks={chunks:<6} wall={results[label]:.2f}s")
+    print(f"speedup {results['sequential'] / results['pipelined']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+# ------------------------------------
+# 📁 benchmarks/bench_onnx_embeddings.py
+# ------------------------------------
+# Accuracy and throughput of the onnxruntime backends against torch:
+# cosine agreement per chunk (min / mean) and chunks/sec.
+#
+#   python benchmarks/bench_onnx_embeddings.py --threads 4
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+from agent.model_registry import get_sentence_model
+from bench_embedding_batching import synthetic_chunks
+
+
+def cosine_agreement(reference, candidate):
+    reference = reference / np.linalg.norm(reference, axis=1, keepdims=True)
+    candidate = candidate / np.linalg.norm(candidate, axis=1, keepdims=True)
+    return (reference * candidate).sum(axis=1)
+
+
+def throughput(model, chunks, batch_size):
+    start = time.perf_counter()
+    vectors = model.encode(chunks, batch_size=batch_size, convert_to_numpy=True)
+    return vectors, len(chunks) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--threads", type=int, default=None)
+    args = parser.parse_args()
+
+    chunks = synthetic_chunks(args.chunks)
+    reference = None
+    for backend in ("torch", "onnx", "onnx-int8"):
+        model = get_sentence_model(backend=backend, num_threads=args.threads)
+        model.encode(["warm up"])
+        vectors, rate = throughput(model, chunks, args.batch_size)
+        if reference is None:
+            reference, baseline = vectors, rate
+            print(f"{backend:<10} {rate:8.1f} chunks/s")
+            continue
+        agreement = cosine_agreement(reference, vectors)
+        print(f"{backend:<10} {rate:8.1f} chunks/s ({rate / baseline:.2f}x) "
+              f"cosine vs torch min={agreement.min():.4f} mean={agreement.mean():.4f}")
+
+
+if __name__ == "__main__":
+    main()
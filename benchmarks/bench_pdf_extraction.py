@@ -0,0 +1,57 @@
+# -------------------------------------
+# 📁 benchmarks/bench_pdf_extraction.py
+# -------------------------------------
+# Compares single-process and multi-process page extraction on a synthetic PDF.
+#
+#   python benchmarks/bench_pdf_extraction.py --pages 900
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import fitz  # PyMuPDF
+from agent.pdf_parser import parse_pdf
+
+PARAGRAPH = (
+    "Transformer architectures have been applied to protein structure prediction, "
+    "single-cell transcriptomics and genome annotation with mixed results. "
+)
+
+
+def make_synthetic_pdf(pages):
+    doc = fitz.open()
+    for i in range(pages):
+        page = doc.new_page()
+        body = f"Page {i + 1}\n\n" + PARAGRAPH * 30
+        page.insert_textbox(fitz.Rect(50, 50, 545, 790), body, fontsize=9)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=900)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    data = make_synthetic_pdf(args.pages)
+    print(f"Synthetic PDF: {args.pages} pages, {len(data) / 1e6:.1f} MB, {os.cpu_count()} CPUs")
+
+    baseline = None
+    for workers in args.workers:
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            parse_pdf(io.BytesIO(data), workers=workers, parallel_threshold=1)
+            best = min(best, time.perf_counter() - start)
+        baseline = baseline or best
+        print(f"workers={workers:<2} best={best:.2f}s speedup={baseline / best:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+# ------------------------------
+# 📁 benchmarks/bench_retrieval.py
+# ------------------------------
+# Build time, memory, query latency (p50/p99) and recall@k against exact
+# search for Chroma HNSW settings, on synthetic or real chunk embeddings.
+#
+#   python benchmarks/bench_retrieval.py --sizes 10000 100000 1000000
+#   python benchmarks/bench_retrieval.py --embeddings chunks.npy
+#
+# The winning (M, ef_construction, ef_search) goes into
+# agent.embedder.HNSW_SETTINGS or the `hnsw` argument of embed_text_chunks.
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import chromadb
+import numpy as np
+from agent.embedder import hnsw_metadata
+
+DIMENSION = 384  # all-MiniLM-L6-v2
+DEFAULT_SETTINGS = [
+    (16, 100, 10),
+    (16, 100, 100),
+    (32, 200, 100),
+    (32, 200, 200),
+    (48, 400, 400),
+]
+
+
+def synthetic_embeddings(n, seed=0):
+    # Clustered, unit-norm vectors are closer to real chunk embeddings than
+    # uniform noise, where every neighbour is roughly equally far away
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(1, n // 200), DIMENSION)).astype(np.float32)
+    vectors = centers[rng.integers(0, len(centers), size=n)] + 0.35 * rng.normal(size=(n, DIMENSION)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+
+
+def exact_neighbours(data, queries, k, block=50_000):
+    # Chroma's default space is squared L2, so ground truth uses the same metric
+    best = None
+    for start in range(0, len(data), block):
+        part = data[start:start + block]
+        distances = (queries ** 2).sum(1)[:, None] - 2 * queries @ part.T + (part ** 2).sum(1)[None, :]
+        ids = np.arange(start, start + len(part))[None, :].repeat(len(queries), 0)
+        if best is not None:
+            distances = np.concatenate([best[0], distances], axis=1)
+            ids = np.concatenate([best[1], ids], axis=1)
+        top = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        best = (np.take_along_axis(distances, top, 1), np.take_along_axis(ids, top, 1))
+    return [set(row) for row in best[1]]
+
+
+def bench_setting(client, data, queries, truth, k, m, ef_construction, ef_search):
+    name = f"bench-{m}-{ef_construction}-{ef_search}"
+    metadata = hnsw_metadata({"M": m, "ef_construction": ef_construction, "ef_search": ef_search})
+    collection = client.create_collection(name, metadata=metadata)
+    before = rss_mb()
+    start = time.perf_counter()
+    batch = client.get_max_batch_size()
+    for offset in range(0, len(data), batch):
+        part = data[offset:offset + batch]
+        collection.add(ids=[str(i) for i in range(offset, offset + len(part))], embeddings=part)
+    build = time.perf_counter() - start
+    memory = rss_mb() - before
+
+    latencies = []
+    hits = 0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        result = collection.query(query_embeddings=[query], n_results=k, include=[])
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += len(expected & {int(i) for i in result["ids"][0]})
+    client.delete_collection(name)
+    latencies.sort()
+    return build, memory, latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.99) - 1], hits / (k * len(queries))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--embeddings", help=".npy file of real chunk embeddings (overrides --sizes)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--settings", nargs="+", metavar="M,EF_C,EF_S",
+                        help="HNSW settings to try, e.g. 16,100,100 32,200,200")
+    args = parser.parse_args()
+
+    settings = [tuple(map(int, s.split(","))) for s in args.settings] if args.settings else DEFAULT_SETTINGS
+    datasets = []
+    if args.embeddings:
+        real = np.load(args.embeddings).astype(np.float32)
+        datasets.append(real / np.linalg.norm(real, axis=1, keepdims=True))
+    else:
+        datasets = [synthetic_embeddings(n) for n in args.sizes]
+
+    client = chromadb.EphemeralClient()
+    rng = np.random.default_rng(1)
+    for data in datasets:
+        # Queries are perturbed corpus vectors, like questions close to a passage
+        queries = data[rng.integers(0, len(data), size=args.queries)]
+        queries = queries + 0.1 * rng.normal(size=queries.shape).astype(np.float32)
+        start = time.perf_counter()
+        truth = exact_neighbours(data, queries, args.k)
+        exact_ms = (time.perf_counter() - start) * 1000 / args.queries
+        print(f"\nn={len(data):,} exact search {exact_ms:.2f} ms/query")
+        print(f"{'M':>4} {'ef_c':>5} {'ef_s':>5} {'build s':>8} {'mem MB':>7} {'p50 ms':>7} {'p99 ms':>7} {'recall@' + str(args.k):>9}")
+        for m, ef_construction, ef_search in settings:
+            build, memory, p50, p99, recall = bench_setting(
+                client, data, queries, truth, args.k, m, ef_construction, ef_search)
+            print(f"{m:>4} {ef_construction:>5} {ef_search:>5} {build:>8.1f} {memory:>7.0f} {p50:>7.2f} {p99:>7.2f} {recall:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# ------------------------------------
+# 📁 benchmarks/bench_upload_memory.py
+# ------------------------------------
+# Measures peak RSS of parsing a large (image-heavy) upload held in memory,
+# as Streamlit hands it over, with and without spooling to a temporary file.
+#
+#   python benchmarks/bench_upload_memory.py --mb 200
+import argparse
+import io
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import fitz  # PyMuPDF
+
+
+def make_scanned_pdf(path, megabytes):
+    # Random pixels do not compress, so each page adds roughly side * side * 3 bytes
+    side = 1024
+    pages = max(1, megabytes * 1024 * 1024 // (side * side * 3))
+    doc = fitz.open()
+    for i in range(pages):
+        page = doc.new_page()
+        pix = fitz.Pixmap(fitz.csRGB, side, side, os.urandom(side * side * 3), 0)
+        page.insert_image(page.rect, pixmap=pix)
+        page.insert_text((50, 50), f"Scanned page {i + 1}", fontsize=12)
+    doc.save(path)
+    doc.close()
+
+
+def peak_rss_mb():
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_child(path, spool_threshold):
+    from agent.pdf_parser import parse_pdf
+
+    with open(path, "rb") as f:
+        upload = io.BytesIO(f.read())
+    before = peak_rss_mb()
+    parse_pdf(upload, spool_threshold=spool_threshold, workers=1)
+    print(f"{before:.0f} {peak_rss_mb():.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mb", type=int, default=200)
+    parser.add_argument("--child", nargs=2, metavar=("PATH", "SPOOL_THRESHOLD"))
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child[0], int(args.child[1]))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "scanned.pdf")
+        make_scanned_pdf(path, args.mb)
+        size_mb = os.path.getsize(path) / 1e6
+        print(f"Synthetic scanned PDF: {size_mb:.0f} MB")
+        modes = [("in-memory", sys.maxsize), ("spooled", 0)]
+        for label, threshold in modes:
+            # A fresh interpreter per mode keeps the peaks independent
+            out = subprocess.check_output([sys.executable, __file__, "--child", path, str(threshold)])
+            before, after = map(float, out.split())
+            print(f"{label:<10} upload held={before:.0f} MB peak={after:.0f} MB parse overhead={after - before:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# ---------------------------------
+# 📁 benchmarks/bench_vector_store.py
+# ---------------------------------
+# Build time and top-k query latency of the in-memory NumPy store against
+# Chroma for session-sized corpora. Embeddings are precomputed random vectors
+# so only the store itself is timed.
+#
+#   python benchmarks/bench_vector_store.py --sizes 10 100 1000 10000
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from agent.embedder import open_collection
+from agent.numpy_store import NumpyVectorStore
+
+DIMENSION = 384  # all-MiniLM-L6-v2
+
+
+class LookupEmbeddings(Embeddings):
+    def __init__(self, vectors):
+        self.vectors = vectors
+
+    def embed_documents(self, texts):
+        return [self.vectors[text] for text in texts]
+
+    def embed_query(self, text):
+        return self.vectors[text]
+
+
+def time_store(store, texts, queries, k):
+    start = time.perf_counter()
+    store.add_texts(texts, metadatas=[{"source": "bench"} for _ in texts], ids=texts)
+    build = time.perf_counter() - start
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        store.similarity_search(query, k=k)
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return build, statistics.median(latencies), latencies[int(len(latencies) * 0.99) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=4)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    for size in args.sizes:
+        texts = [f"chunk-{i}" for i in range(size)]
+        queries = [f"query-{i}" for i in range(args.queries)]
+        vectors = dict(zip(texts + queries, rng.normal(size=(size + args.queries, DIMENSION)).tolist()))
+        embedding = LookupEmbeddings(vectors)
+
+        with tempfile.TemporaryDirectory() as persist_dir:
+            chroma = open_collection(f"bench-{size}", "bench", embedding, persist_dir)
+            results = {
+                "numpy": time_store(NumpyVectorStore(embedding), texts, queries, args.k),
+                "chroma": time_store(chroma, texts, queries, args.k),
+            }
+        for label, (build, p50, p99) in results.items():
+            print(f"n={size:<6} {label:<6} build={build * 1000:8.1f}ms query p50={p50:6.2f}ms p99={p99:6.2f}ms")
+
+
+if __name__ == "__main__":
+    main()